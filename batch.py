@@ -0,0 +1,393 @@
+#!/usr/bin/python3
+"""Lockstep batched Battleship simulator.
+
+Runs thousands of AI games at once as NumPy arrays of shape
+(games, size * size). Every step fires one shot in every unfinished
+game; finished games are dropped from the arrays.
+
+Two policies are vectorized:
+
+    'parity'  AIPlayer.shoot_random: PARITY_TRIES tries at a random
+              checkerboard location, else any untried location.
+              Never targets.
+    'ai_2_0'  AIPlayer_2_0: hunts clear areas while every ship left is
+              longer than two, else as 'parity'; after a hit it works
+              through the same target queue, kept as per-location stamps.
+
+compare_with_engine checks batched turn counts against engine.play_seeded
+games of AIPlayer_Parity and AIPlayer_2_0 themselves.
+
+Requires NumPy.
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from constants import BOARD_SIZE, FOUR_DIRECTION, PARITY_TRIES, SHIP_INFO
+from engine import play_seeded
+from models import AIPlayer, AIPlayer_2_0
+from placement import placement_index
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+POLICIES = ('parity', 'ai_2_0')
+
+
+@lru_cache(maxsize=None)
+def _placement_table(size, length):
+    """Return (placements, size*size) float32 0/1 matrix of placements"""
+    index = placement_index(size, length)
+    table = np.zeros((len(index), size * size), dtype=np.float32)
+    for pid, cells in enumerate(index.cells):
+        table[pid, list(cells)] = 1
+    return table
+
+
+@lru_cache(maxsize=None)
+def _parity(size):
+    """Return flat bool mask of checkerboard locations ((row+col) even)"""
+    rows, cols = np.indices((size, size))
+    return ((rows + cols) % 2 == 0).ravel()
+
+
+def place_fleets(count, size=BOARD_SIZE, ship_lengths=None, rng=None):
+    """Place count independent random fleets
+
+    Ships are placed in order, each uniformly among the legal placements
+    not colliding with earlier ships, as engine.place_fleet does. A fleet
+    where a ship has no such placement left is drawn again.
+
+    Args:
+        count (int): number of fleets
+        size (int): board size
+        ship_lengths (List[int]): ship lengths, default from SHIP_INFO
+        rng (numpy.random.Generator): random source
+
+    Returns:
+        ndarray[int8]: (count, size*size) ship id per location, -1 if empty
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    if ship_lengths is None:
+        ship_lengths = [length for _, length in SHIP_INFO]
+    ship_of = np.full((count, size * size), -1, dtype=np.int8)
+    todo = np.arange(count)
+    while todo.size:
+        fleets, placed = _draw_fleets(todo.size, size, ship_lengths, rng)
+        ship_of[todo[placed]] = fleets[placed]
+        todo = todo[~placed]
+    return ship_of
+
+
+def _draw_fleets(count, size, ship_lengths, rng):
+    """Draw count fleets once, see place_fleets
+
+    Returns: tuple (ship_of, placed)
+        ship_of (ndarray[int8]): (count, size*size) as place_fleets
+        placed (ndarray[bool]): (count,) False where a ship had no free
+            placement and the fleet overlaps
+    """
+    ship_of = np.full((count, size * size), -1, dtype=np.int8)
+    occupied = np.zeros((count, size * size), dtype=np.float32)
+    placed = np.ones(count, dtype=bool)
+    for ship_id, length in enumerate(ship_lengths):
+        table = _placement_table(size, length)
+        collide = occupied @ table.T
+        free = collide == 0
+        placed &= free.any(axis=1)
+        # argmax of uniform noise over allowed placements picks uniformly
+        weights = np.where(free, rng.random(collide.shape, dtype=np.float32),
+                           -1)
+        chosen = table[weights.argmax(axis=1)] > 0
+        ship_of[chosen] = ship_id
+        occupied[chosen] = 1
+    return ship_of, placed
+
+
+# queue stamp of a location that is not queued
+UNQUEUED = np.iinfo(np.int32).max
+# FOUR_DIRECTION as arrays, and the push orders of AIPlayer_2_0 with
+# direction i moved to the end
+DIRECTIONS = np.array(FOUR_DIRECTION)
+HIT_ORDERS = np.array([[j for j in range(4) if j != i] + [i]
+                       for i in range(4)] + [list(range(4))])
+
+
+def _dilate(grid, reach):
+    """Return locations 1 to reach steps from a set location, see dilate
+
+    Args:
+        grid (ndarray[bool]): (b, n, n) location masks
+        reach (ndarray[int]): (b,) maximum steps of each mask
+    """
+    out = np.zeros_like(grid)
+    size = grid.shape[1]
+    for step in range(1, min(int(reach.max()), size - 1) + 1):
+        active = (reach >= step)[:, None, None]
+        out[:, step:, :] |= grid[:, :-step, :] & active
+        out[:, :-step, :] |= grid[:, step:, :] & active
+        out[:, :, step:] |= grid[:, :, :-step] & active
+        out[:, :, :-step] |= grid[:, :, step:] & active
+    return out
+
+
+def _hunt(policy, shot, min_len, size, rng):
+    """Pick one hunting location per game, returns (b,) location indices
+
+    Args:
+        policy (str): one of POLICIES
+        shot (ndarray[bool]): (b, size*size) locations already shot
+        min_len (ndarray[int]): (b,) shortest ship still afloat
+        size (int): board size
+        rng (numpy.random.Generator): random source
+    """
+    games, cells = shot.shape
+    unshot = ~shot
+    # parity hunting: PARITY_TRIES tries at a random checkerboard location
+    # succeed with probability 1 - (1 - k/n)**PARITY_TRIES when k of the
+    # n checkerboard locations are still untried
+    parity = _parity(size)
+    parity_cells = int(parity.sum())
+    parity_unshot = unshot & parity
+    untried = parity_unshot.sum(axis=1)
+    success = (rng.random(games) <
+               1 - (1 - untried / parity_cells) ** PARITY_TRIES)
+    pool = np.where(success[:, None], parity_unshot, unshot)
+
+    if policy == 'ai_2_0':
+        # AIPlayer_2_0.shoot_random: while every ship left is longer than
+        # two, prefer untried locations with nothing shot within min_len
+        search = np.flatnonzero(min_len > 2)
+        if search.size:
+            near = _dilate(shot[search].reshape(-1, size, size),
+                           min_len[search]).reshape(-1, cells)
+            clear = unshot[search] & ~near
+            miss_all = 1 - clear.sum(axis=1) / unshot[search].sum(axis=1)
+            use = rng.random(search.size) >= miss_all ** PARITY_TRIES
+            pool[search[use]] = clear[use]
+    score = np.where(pool, rng.random((games, cells), dtype=np.float32), -1)
+    return score.argmax(axis=1)
+
+
+def _push_targets(queue, clock, shot, record, rows, size):
+    """Queue targets after a hit, as AIPlayer_2_0.deal_shoot_response
+
+    Neighbours of the latest unsunk hit are pushed to the front of the
+    queue, the direction from the hit before it last; then queued
+    locations on the axis of those two hits are promoted.
+
+    Args:
+        queue (ndarray[int32]): (b, size*size) queue stamps, front lowest,
+            UNQUEUED when not queued; updated in place
+        clock (ndarray[int32]): (b,) lowest stamp used; updated in place
+        shot (ndarray[bool]): (b, size*size) locations already shot
+        record (ndarray[int32]): (b, size*size) order of unsunk hits, -1
+            where there is none
+        rows (ndarray[int]): games that hit and still have unsunk hits
+        size (int): board size
+    """
+    cells = size * size
+    hits = record[rows]
+    last = hits.argmax(axis=1)
+    hits[np.arange(rows.size), last] = -1
+    prev = hits.argmax(axis=1)
+    has_prev = hits.max(axis=1) >= 0
+    x, y = divmod(last, size)
+    dx, dy = x - prev // size, y - prev % size
+    same = ((dx[:, None] == DIRECTIONS[:, 0])
+            & (dy[:, None] == DIRECTIONS[:, 1]))
+    moved = has_prev & same.any(axis=1)
+    order = HIT_ORDERS[np.where(moved, same.argmax(axis=1), 4)]
+
+    for k in range(4):
+        nx = x + DIRECTIONS[order[:, k], 0]
+        ny = y + DIRECTIONS[order[:, k], 1]
+        ok = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+        cell = np.where(ok, nx * size + ny, 0)
+        ok &= ~shot[rows, cell] & (queue[rows, cell] == UNQUEUED)
+        push = rows[ok]
+        clock[push] -= 1
+        queue[push, cell[ok]] = clock[push]
+
+    # TargetQueue.promote: the row when dx is 0, else the column when dy
+    # is 0, pushed front first so the line ends up reversed at the front
+    index = np.arange(cells)
+    line = ((dx == 0)[:, None] & (index // size == x[:, None])
+            | ((dx != 0) & (dy == 0))[:, None] & (index % size == y[:, None]))
+    line &= has_prev[:, None]
+    stamps = queue[rows]
+    line &= stamps != UNQUEUED
+    if line.any():
+        order = np.argsort(np.where(line, stamps, UNQUEUED), axis=1,
+                           kind='stable')
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, index[None, :], axis=1)
+        stamps = np.where(line, clock[rows][:, None] - 1 - rank, stamps)
+        queue[rows] = stamps
+        clock[rows] -= line.sum(axis=1).astype(np.int32)
+
+
+def simulate_boards(ship_of, ship_lengths, policy='ai_2_0', rng=None):
+    """Shoot at every board in lockstep until each fleet is sunk
+
+    Args:
+        ship_of (ndarray[int8]): (boards, size*size) from place_fleets
+        ship_lengths (List[int]): ship lengths, indexed by ship id
+        policy (str): one of POLICIES
+        rng (numpy.random.Generator): random source
+
+    Returns:
+        ndarray[int]: shots needed to sink each fleet
+    """
+    if policy not in POLICIES:
+        raise ValueError("Unknown policy {}".format(policy))
+    rng = rng if rng is not None else np.random.default_rng()
+    boards, cells = ship_of.shape
+    size = int(round(cells ** 0.5))
+    ship_of = ship_of.copy()
+    lengths = np.array(ship_lengths, dtype=np.int16)
+    remaining = np.tile(lengths, (boards, 1))
+    afloat = np.full(boards, len(ship_lengths), dtype=np.int16)
+    shot = np.zeros((boards, cells), dtype=bool)
+    # target queue stamps, and AIPlayer_2_0.hit_record as hit order
+    queue = np.full((boards, cells), UNQUEUED, dtype=np.int32)
+    clock = np.zeros(boards, dtype=np.int32)
+    record = np.full((boards, cells), -1, dtype=np.int32)
+    ids = np.arange(boards)
+    result = np.zeros(boards, dtype=np.int64)
+
+    step = 0
+    while ids.size:
+        step += 1
+        rows = np.arange(ids.size)
+        cell = np.empty(ids.size, dtype=np.int64)
+        target = (queue != UNQUEUED).any(axis=1)
+        cell[target] = queue[target].argmin(axis=1)
+        hunt = rows[~target]
+        if hunt.size:
+            min_len = np.where(remaining[hunt] > 0, lengths,
+                               cells).min(axis=1)
+            cell[hunt] = _hunt(policy, shot[hunt], min_len, size, rng)
+        shot[rows, cell] = True
+        queue[rows, cell] = UNQUEUED
+        ship = ship_of[rows, cell].astype(np.int64)
+        hit_rows = rows[ship >= 0]
+        hit_ships = ship[ship >= 0]
+        remaining[hit_rows, hit_ships] -= 1
+        record[hit_rows, cell[ship >= 0]] = step
+        sank = remaining[hit_rows, hit_ships] == 0
+        sunk_rows = hit_rows[sank]
+        if sunk_rows.size:
+            record[sunk_rows] = np.where(
+                ship_of[sunk_rows] == hit_ships[sank][:, None], -1,
+                record[sunk_rows])
+            queue[sunk_rows] = UNQUEUED
+            afloat[sunk_rows] -= 1
+        if policy == 'ai_2_0':
+            follow = hit_rows[(record[hit_rows] >= 0).any(axis=1)]
+            if follow.size:
+                _push_targets(queue, clock, shot, record, follow, size)
+        done = afloat == 0
+        if done.any():
+            result[ids[done]] = step
+            keep = ~done
+            ids, ship_of, remaining, afloat = (
+                ids[keep], ship_of[keep], remaining[keep], afloat[keep])
+            shot, queue, clock, record = (
+                shot[keep], queue[keep], clock[keep], record[keep])
+    return result
+
+
+def simulate_games(num_games, policy1='ai_2_0', policy2='ai_2_0',
+                   seed=None, size=BOARD_SIZE, ship_info=SHIP_INFO,
+                   batch_size=8192):
+    """Play num_games two-player games in batches
+
+    The players' shots never interact, so each game is two boards
+    simulated independently: turns is the smaller shot count and player 1
+    wins ties because it moves first, as in play_a_game.
+
+    Args:
+        num_games (int): number of games
+        policy1 (str): policy of player 1 (moves first)
+        policy2 (str): policy of player 2
+        seed (int): seed for numpy.random.default_rng
+        size (int): board size
+        ship_info (List[tuple]): (ship_name, ship_size) of each ship
+        batch_size (int): games simulated at once
+
+    Returns: tuple (turns, winners)
+        turns (ndarray[int]): rounds played in each game
+        winners (ndarray[int]): 1 or 2, winning player of each game
+    """
+    rng = np.random.default_rng(seed)
+    lengths = [length for _, length in ship_info]
+    turns = np.empty(num_games, dtype=np.int64)
+    winners = np.empty(num_games, dtype=np.int8)
+    for start in range(0, num_games, batch_size):
+        count = min(batch_size, num_games - start)
+        # player 1 shoots at player 2's fleet and vice versa
+        shots1 = simulate_boards(place_fleets(count, size, lengths, rng),
+                                 lengths, policy1, rng)
+        shots2 = simulate_boards(place_fleets(count, size, lengths, rng),
+                                 lengths, policy2, rng)
+        turns[start:start + count] = np.minimum(shots1, shots2)
+        winners[start:start + count] = np.where(shots1 <= shots2, 1, 2)
+    return turns, winners
+
+
+class AIPlayer_Parity(AIPlayer):
+    """AIPlayer only ever using AIPlayer.shoot_random (batch 'parity')"""
+
+    def guess(self):
+        return self.shoot_random()
+
+    def deal_shoot_response(self, event):
+        self.record_shot(event)
+
+
+PLAYERS = {'parity': AIPlayer_Parity, 'ai_2_0': AIPlayer_2_0}
+
+
+def compare_with_engine(num_games, policy='ai_2_0', seed=0,
+                        engine_games=None):
+    """Compare batched turn counts with games of the engine's own players
+
+    The engine side plays PLAYERS[policy] (AIPlayer_2_0 for 'ai_2_0')
+    through engine.play_seeded, so a gap well beyond its standard error
+    means the batch does not model that player.
+
+    Args:
+        num_games (int): batched games
+        policy (str): policy used by both players
+        seed (int): seed for both the batch and the engine games
+        engine_games (int): engine games, default num_games
+
+    Returns:
+        dict: mean and standard deviation of turns, and player 1 win
+            rate, under 'batch' and 'engine'; 'gap' is the difference of
+            the mean turns (batch - engine) and its standard error
+    """
+    if engine_games is None:
+        engine_games = num_games
+    turns, winners = simulate_games(num_games, policy, policy, seed)
+    engine_turns, engine_winners = [], []
+    player_class = PLAYERS[policy]
+    for game in range(engine_games):
+        result = play_seeded(
+            lambda rng1, rng2: (player_class(1, rng1), player_class(2, rng2)),
+            seed * 1000003 + game)
+        engine_turns.append(result.turns)
+        engine_winners.append(result.winner.name == "AI-1")
+    engine_turns = np.array(engine_turns)
+    stderr = (turns.var() / num_games
+              + engine_turns.var() / engine_games) ** 0.5
+    return {
+        'batch': (turns.mean(), turns.std(), (winners == 1).mean()),
+        'engine': (engine_turns.mean(), engine_turns.std(),
+                   np.mean(engine_winners)),
+        'gap': (turns.mean() - engine_turns.mean(), stderr),
+    }
@@ -3,9 +3,12 @@
 
 Project 2 - Treehouse Techdegree - Python Web Development
 """
-from constants import SHIP_INFO
+from config import DEFAULT_CONFIG
+from constants import BANNER
 from models import Player, Ship
-from utils import (clear_screen, is_legal_coord, print_legend, show_banner)
+from terminal import TerminalRenderer
+from utils import (clear_screen, coord_to_cell, is_legal_coord, legend,
+                   print_legend, ship_cells, show_banner)
 
 __author__ = "Chris Freeman"
 __copyright__ = "Copyright 2016, Chris Freeman"
@@ -35,16 +38,17 @@ def print_board(player_name, player_view):
         player_view (List[str]): list of strings representing board view
     """
 
+    width = max(map(len, player_view))
     # board titles
-    print("   {:_^22}\n".format(player_name + "'s board:"))
+    print("   {:_^{}}\n".format(player_name + "'s board:", width))
     # stitch together board views for display
     for player_line in player_view:
-        print("   {:22}".format(player_line))
+        print("   {:{}}".format(player_line, width))
     print_legend()
 
 
-def print_all_boards(opp_name, player_name, opp_view, player_view):
-    """Print both player boards
+def all_boards_lines(opp_name, player_name, opp_view, player_view):
+    """Return both player boards side by side, as lines of text
 
     Args:
         opp_name (str): name of opponent
@@ -53,16 +57,41 @@ def print_all_boards(opp_name, player_name, opp_view, player_view):
         player_view (List[str]): list of strings representing board view
     """
 
+    width = max(map(len, opp_view + player_view))
     # boards titles
-    print("   {:_^22}        {:_^22}\n".format(
-        opp_name + "'s board:", player_name + "'s board:"))
+    lines = ["   {0:_^{2}}        {1:_^{2}}".format(
+        opp_name + "'s board:", player_name + "'s board:", width), ""]
     # stitch together board views for display
     for opp_line, player_line in zip(opp_view, player_view):
-        print("   {:22}        {:22}".format(opp_line, player_line))
+        lines.append("   {0:{2}}        {1:{2}}".format(
+            opp_line, player_line, width))
+    return lines
+
+
+def print_all_boards(opp_name, player_name, opp_view, player_view):
+    """Print both player boards
+
+    Args:
+        opp_name (str): name of opponent
+        player_name (str): name of current player
+        opp_view (List[str]): list of strings representing board view
+        player_view (List[str]): list of strings representing board view
+    """
+    print("\n".join(all_boards_lines(opp_name, player_name, opp_view,
+                                     player_view)))
     print_legend()
 
 
-def gen_ship_coords(anchor, size, direction):
+def turn_frame(player, opponent, message=""):
+    """Return the screen of player's turn, as lines of text"""
+    return (BANNER.split("\n") + ["It's {}'s turn:".format(player.name), ""] +
+            all_boards_lines(opponent.name, player.name,
+                             opponent.board.get_opponent_view(),
+                             player.board.get_player_view()) +
+            [legend(), "", message])
+
+
+def gen_ship_coords(anchor, size, direction, board_size=DEFAULT_CONFIG.size):
     """Generate ship board coordinate based on anchor location and size
 
     The ship coordinates start at the anchor position and run Down for
@@ -71,40 +100,29 @@ def gen_ship_coords(anchor, size, direction):
     Verify ship fits on board.
 
     Args:
-        anchor (str): two character board coordinate "A1"
+        anchor (str): board coordinate "A1"
         size (int): size of ship in board spaces
         orientation (str): is ship Horizontal or Vertical
+        board_size (int): size of board
 
     Returns:
-        List[str]: list of board coordinates, if valid. Empty list otherwise.
+        tuple[int]: location indices, if valid. Empty tuple otherwise.
     """
-    ship_col = ord(anchor[0].upper())
-    ship_row = int(anchor[1:])
-    if direction[0].lower() == 'v':
-        # ship runs vertically DOWN from anchor
-        coords = [chr(ship_col) + str(row)
-                  for row in range(ship_row, ship_row + size)]
-    else:
-        # ship runs horizontally RIGHT from anchor
-        coords = [chr(col) + str(ship_row)
-                  for col in range(ship_col, ship_col + size)]
-    # check if ship bow and stern are on board
-    if is_legal_coord(coords[0]) and is_legal_coord(coords[-1]):
-        # coords confirmed
-        return coords
-    else:
+    cells = ship_cells(coord_to_cell(anchor, board_size), size, direction,
+                       board_size)
+    if not cells:
         # bad ship coords
-        print("Error: not all coords on board: ", coords)
-        return []
+        print("Error: not all coords on board: ", anchor, size, direction)
+    return cells
 
 
-def get_anchor_coord():
+def get_anchor_coord(board_size=DEFAULT_CONFIG.size):
     """Ask user for ship anchor coordinates"""
     while True:
         response = input("What is the upper-most or left-most ship postion "
                          "(for example D4): ").strip()
         anchor = response.upper()
-        if is_legal_coord(anchor):
+        if is_legal_coord(anchor, board_size):
             return anchor
         else:
             print("Coordnate {} is not on the board. Please enter Letter "
@@ -112,17 +130,19 @@ def get_anchor_coord():
 
 
 def get_guess(player):
-    """Ask user for guess"""
+    """Ask user for guess, returns location index"""
     while True:
         response = input("Enter {}'s guess (for example D4): "
                          "".format(player.name)).strip()
         guess = response.upper()
-        if guess in player.guesses:
+        size = player.board.size
+        if (is_legal_coord(guess, size) and
+                coord_to_cell(guess, size) in player.guesses):
             print("Coordnate {} already guessed. Try Again."
                   "".format(response))
             continue
-        if is_legal_coord(guess):
-            return guess
+        if is_legal_coord(guess, size):
+            return coord_to_cell(guess, size)
         else:
             print("Coordnate {} is not on the board. Please enter Letter "
                   "and Number as one word.".format(response))
@@ -147,7 +167,7 @@ def get_vert_or_horiz():
 def define_fleet(player):
     """Define player's ships and place on board"""
     # place each ship
-    for ship_spec in SHIP_INFO:
+    for ship_spec in player.config.ship_info:
         ship_name = ship_spec[0]
         ship_size = ship_spec[1]
         # display top banner
@@ -164,21 +184,22 @@ def define_fleet(player):
             # 1. ask if vertical or horizontal
             direction = get_vert_or_horiz()
             # 2. ask for top or left starting coordinate
-            anchor = get_anchor_coord()
+            anchor = get_anchor_coord(player.board.size)
             # 3. validate input (explain why input rejected)
-            coords = gen_ship_coords(anchor, ship_size, direction)
+            cells = gen_ship_coords(anchor, ship_size, direction,
+                                    player.board.size)
             # 4. validate ship placement
-            if not coords:
+            if not cells:
                 print("Error: ship coordinates not all on the board\n")
                 continue
-            if not player.board.verify_empty(coords):
+            if not player.board.verify_empty(cells):
                 print("Error: ship coordinates collide with other ships. "
                       "Try again\n")
                 continue
             # input valid; last while loop
             break
         # create ship from input
-        ship = Ship(ship_name, ship_size, coords, direction)
+        ship = Ship(ship_name, ship_size, cells, direction)
         # add ship to players list
         player.add_ship(ship)
         # place ship on game board
@@ -195,42 +216,31 @@ def define_fleet(player):
     clear_screen()
 
 
-def take_turn(player, opponent):
-    """Take a turn"""
+def take_turn(player, opponent, renderer):
+    """Take a turn
 
-    clear_screen()
-    show_banner()
+    Screens go through renderer (terminal.TerminalRenderer), so after
+    the guess only the guessed cells and the message are redrawn. Between
+    turns the screen shows just the banner, so neither player sees the
+    other's board.
+    """
+
+    renderer.draw(BANNER.split("\n"))
     input("It's {}'s turn. Hit ENTER to continue....".format(player.name))
 
-    clear_screen()
-    show_banner()
-    print("It's {}'s turn:\n".format(player.name))
     # print boards for guessing
-    opp_view = opponent.board.get_opponent_view()
-    player_view = player.board.get_player_view()
+    renderer.draw(turn_frame(player, opponent))
 
-    # stitch together board views for display
-    print_all_boards(opponent.name, player.name, opp_view, player_view)
-
-    coord = get_guess(player)
-    # remember guessed coordinates
-    player.guesses.append(coord)
+    cell = get_guess(player)
+    # remember guessed locations
+    player.guesses.append(cell)
     # process guess
-    response = opponent.board.guess(coord)
-
-    # update board and display response
-    opp_view = opponent.board.get_opponent_view()
+    response = opponent.board.guess(cell)
 
-    # reprint boards
-    clear_screen()
-    show_banner()
-    print("It's {}'s turn:\n".format(player.name))
-    # print both boards
-    print_all_boards(opponent.name, player.name, opp_view, player_view)
-    print(response)
+    # redraw boards with the response
+    renderer.draw(turn_frame(player, opponent, response.message.rstrip()))
 
     input("Hit ENTER to clear screen and end your turn....")
-    clear_screen()
 
 
 def main():
@@ -259,16 +269,17 @@ def main():
     # commense game play
     show_banner()
     input("Game Time! {} goes first. Hit ENTER to continue....".format(name1))
+    renderer = TerminalRenderer()
     game_continue = True
     while game_continue:
-        take_turn(player1, player2)
+        take_turn(player1, player2, renderer)
         if not player2.ships_left():
             show_banner()
             input("{} WINS!!! Hit ENTER to see final boards....\n"
                   "".format(player1.name))
             game_continue = False
             continue
-        take_turn(player2, player1)
+        take_turn(player2, player1, renderer)
         if not player1.ships_left():
             show_banner()
             input("{} WINS!!! Hit ENTER to see final boards....\n"
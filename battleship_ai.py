@@ -3,9 +3,22 @@
 
 Project 2 - Treehouse Techdegree - Python Web Development
 """
-from constants import SHIP_INFO
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+import random
+
+from config import DEFAULT_CONFIG, GameConfig
+from corpus import open_corpus
+from engine import fire, play_seeded, rng_stream
+from gamelog import MAX_SIZE as LOG_MAX_SIZE
+from gamelog import GameLog, fleet_layout
 from models import *
-from utils import (clear_screen, is_legal_coord, print_legend, show_banner)
+from placement import INDEX_MAX_SIZE
+from replay import play_recorded, tournament_players
+from terminal import TerminalRenderer
+from utils import (cell_to_coord, clear_screen, legend, print_legend,
+                   ship_cells, show_banner)
 # import matplotlib.pyplot as plt
 
 __author__ = "Chris Freeman"
@@ -24,16 +37,17 @@ def print_board(player_name, player_view):
         player_view (List[str]): list of strings representing board view
     """
 
+    width = max(map(len, player_view))
     # board titles
-    print("   {:_^22}\n".format(player_name + "'s board:"))
+    print("   {:_^{}}\n".format(player_name + "'s board:", width))
     # stitch together board views for display
     for player_line in player_view:
-        print("   {:22}".format(player_line))
+        print("   {:{}}".format(player_line, width))
     print_legend()
 
 
-def print_all_boards(opp_name, player_name, opp_view, player_view):
-    """Print both player boards
+def all_boards_lines(opp_name, player_name, opp_view, player_view):
+    """Return both player boards side by side, as lines of text
 
     Args:
         opp_name (str): name of opponent
@@ -41,16 +55,58 @@ def print_all_boards(opp_name, player_name, opp_view, player_view):
         opp_view (List[str]): list of strings representing board view
         player_view (List[str]): list of strings representing board view
     """
+    width = max(map(len, opp_view + player_view))
     # boards titles
-    print("   {:_^22}        {:_^22}\n".format(
-        opp_name + "'s board:", player_name + "'s board:"))
+    lines = ["   {0:_^{2}}        {1:_^{2}}".format(
+        opp_name + "'s board:", player_name + "'s board:", width), ""]
     # stitch together board views for display
     for opp_line, player_line in zip(opp_view, player_view):
-        print("   {:22}        {:22}".format(opp_line, player_line))
+        lines.append("   {0:{2}}        {1:{2}}".format(
+            opp_line, player_line, width))
+    return lines
+
+
+def print_all_boards(opp_name, player_name, opp_view, player_view):
+    """Print both player boards
+
+    Args:
+        opp_name (str): name of opponent
+        player_name (str): name of current player
+        opp_view (List[str]): list of strings representing board view
+        player_view (List[str]): list of strings representing board view
+    """
+    print("\n".join(all_boards_lines(opp_name, player_name, opp_view,
+                                     player_view)))
     print_legend()
 
 
-def gen_ship_coords(anchor, size, direction):
+def spectator_frame(player1, player2, shooter, event, turn_count):
+    """Return the AI vs AI display after a shot, as lines of text
+
+    The layout is the same after every shot, player 2's board as player 1
+    sees it next to player 1's own board, so a TerminalRenderer only
+    redraws what the shot changed.
+
+    Args:
+        player1 (Player): first player
+        player2 (Player): second player
+        shooter (Player): player who just fired
+        event (ShotEvent): the shot
+        turn_count (int): current turn
+    """
+    target = player2 if shooter is player1 else player1
+    ship = target.board.ships[event.ship_id] if event.outcome == SUNK else None
+    result = ShotResult(event.cell, event.outcome, ship, event.ship_id,
+                        target.board.size)
+    return (BANNER.split("\n") +
+            ["Turn {}: {}".format(turn_count, shooter.name), ""] +
+            all_boards_lines(player2.name, player1.name,
+                             player2.board.get_opponent_view(),
+                             player1.board.get_player_view()) +
+            [legend(), "", result.message.rstrip()])
+
+
+def gen_ship_coords(anchor, size, direction, board_size=DEFAULT_CONFIG.size):
     """Generate ship board coordinate based on anchor location and size
 
     The ship coordinates start at the anchor position and run Down for
@@ -59,74 +115,76 @@ def gen_ship_coords(anchor, size, direction):
     Verify ship fits on board.
 
     Args:
-        anchor (str): two character board coordinate "A1"
+        anchor (int): location index of the anchor
         size (int): size of ship in board spaces
         orientation (str): is ship Horizontal or Vertical
+        board_size (int): size of board
 
     Returns:
-        List[str]: list of board coordinates, if valid. Empty list otherwise.
+        tuple[int]: location indices, if valid. Empty tuple otherwise.
     """
-    ship_col = ord(anchor[0].upper())
-    ship_row = int(anchor[1:])
-    if direction[0].lower() == 'v':
-        # ship runs vertically DOWN from anchor
-        coords = [chr(ship_col) + str(row)
-                  for row in range(ship_row, ship_row + size)]
-    else:
-        # ship runs horizontally RIGHT from anchor
-        coords = [chr(col) + str(ship_row)
-                  for col in range(ship_col, ship_col + size)]
-    # check if ship bow and stern are on board
-    if is_legal_coord(coords[0]) and is_legal_coord(coords[-1]):
-        # coords confirmed
-        return coords
-    else:
+    cells = ship_cells(anchor, size, direction, board_size)
+    if not cells:
         # bad ship coords
-        print("Error: not all coords on board: ", coords)
-        return []
+        print("Error: not all coords on board: ",
+              cell_to_coord(anchor, board_size), size, direction)
+    return cells
 
 def define_fleet(player):
     """Define player's ships and place on board"""
-    # place each ship
-    for ship_spec in SHIP_INFO:
-        ship_name = ship_spec[0]
-        ship_size = ship_spec[1]
-        # display top banner
-        clear_screen()
-        show_banner()
-        print("Placing Ships for {}:\n".format(player.name))
-        # display board
-        if type(player)==HumanPlayer:
-            print_board(player.name, player.board.get_player_view())
-        # display ship info
-        print("Placing {} (size:{})\n".format(ship_name, ship_size))
-
-        # get ship placement details
-        while True:
-            # 1. ask if vertical or horizontal
-            # direction = get_vert_or_horiz()
-            direction, anchor = player.direction_anchor(ship_spec)
-            # 2. ask for top or left starting coordinate
-            # anchor = get_anchor_coord()
-            # 3. validate input (explain why input rejected)
-            coords = gen_ship_coords(anchor, ship_size, direction)
-            # 4. validate ship placement
-            if not coords:
-                print("Error: ship coordinates not all on the board\n")
-                continue
-            if not player.board.verify_empty(coords):
-                print("Error: ship coordinates collide with other ships. "
-                      "Try again\n")
-                continue
-            # input valid; last while loop
+    while True:
+        # place each ship
+        for ship_spec in player.config.ship_info:
+            ship_name = ship_spec[0]
+            ship_size = ship_spec[1]
+            # display top banner
+            clear_screen()
+            show_banner()
+            print("Placing Ships for {}:\n".format(player.name))
+            # display board
+            if type(player)==HumanPlayer:
+                print_board(player.name, player.board.get_player_view())
+            # display ship info
+            print("Placing {} (size:{})\n".format(ship_name, ship_size))
+
+            # get ship placement details
+            while True:
+                # 1. ask if vertical or horizontal
+                # direction = get_vert_or_horiz()
+                placement = player.direction_anchor(ship_spec)
+                if placement is None:
+                    break
+                direction, anchor = placement
+                # 2. ask for top or left starting coordinate
+                # anchor = get_anchor_coord()
+                # 3. validate input (explain why input rejected)
+                cells = gen_ship_coords(anchor, ship_size, direction,
+                                        player.board.size)
+                # 4. validate ship placement
+                if not cells:
+                    print("Error: ship coordinates not all on the board\n")
+                    continue
+                if not player.board.verify_empty(cells):
+                    print("Error: ship coordinates collide with other ships. "
+                          "Try again\n")
+                    continue
+                # input valid; last while loop
+                break
+            if placement is None:
+                # earlier ships left no room: place the whole fleet again
+                print("Error: no room left for {}. Placing the fleet again\n"
+                      "".format(ship_name))
+                player.clear_fleet()
+                break
+            # create ship from input
+            ship = Ship(ship_name, ship_size, cells, direction)
+            # add ship to players list
+            player.add_ship(ship)
+            # place ship on game board
+            player.board.place_ship(ship)
+            # 5. redraw screen for next ship (at top of loop)
+        else:
             break
-        # create ship from input
-        ship = Ship(ship_name, ship_size, coords, direction)
-        # add ship to players list
-        player.add_ship(ship)
-        # place ship on game board
-        player.board.place_ship(ship)
-        # 5. redraw screen for next ship (at top of loop)
     # display top banner
     # clear_screen()
     # show_banner()
@@ -140,10 +198,16 @@ def define_fleet(player):
     # clear_screen()
 
 
-def take_turn(player, opponent, play_mode = 1):
-    """Take a turn"""
+def take_turn(player, opponent, play_mode = 1, show=True):
+    """Take a turn
+
+    Args:
+        show (bool): print boards and messages; off when a renderer draws
+    """
 
     # input("It's {}'s turn. Hit ENTER to continue....".format(player.name))
+    if not show:
+        return fire(player, opponent)
     print("It's {}'s turn:\n".format(player.name))
     # print boards for guessing
     player_view = player.board.get_player_view()
@@ -154,14 +218,15 @@ def take_turn(player, opponent, play_mode = 1):
         print_all_boards(opponent.name, player.name, opp_view, player_view)
 
     # coord = get_guess(player)
-    coord = player.guess()
+    cell = player.guess()
 
-    # remember guessed coordinates
-    player.guesses.append(coord)
+    # remember guessed locations
+    player.guesses.append(cell)
     
     # process guess
-    response = opponent.board.guess(coord)
-    player.deal_shoot_response(coord, response, opponent.board.get_opponent_view(as_list=True))
+    result = opponent.board.guess(cell)
+    event = result.event()
+    player.deal_shoot_response(event)
 
     # update board and display response
     # print("It's {}'s turn:\n".format(player.name))
@@ -170,13 +235,23 @@ def take_turn(player, opponent, play_mode = 1):
         opp_view = opponent.board.get_opponent_view()
         print_all_boards(opponent.name, player.name, opp_view, player_view)
     
-    print(response)
+    print(result.message)
     # input("Hit ENTER to clear screen and end your turn....")
+    return event
 
-def play_a_game(player1, player2, play_mode):
-#    seed = 11
-#    random.seed(seed)
+def play_a_game(player1, player2, play_mode, game_log=None, seed=0):
+    """Play one game with console output
 
+    Args:
+        player1 (Player): first player, moves first
+        player2 (Player): second player
+        play_mode (int): menu play mode, decides which boards are shown;
+            mode 3 animates every shot through a TerminalRenderer
+        game_log (GameLog): append the finished game here, if given
+        seed (int): seed recorded with the game in game_log
+
+    Returns: tuple (turn_count, winner)
+    """
     name1 = player1.name
     name2 = player2.name
     print("\nNext you'll each add your ships. {} first. (No peeking {})\n\n"
@@ -194,17 +269,31 @@ def play_a_game(player1, player2, play_mode):
     # commense game play
     show_banner()
     print("Game Time! {} goes first. Hit ENTER to continue....".format(name1))
+    renderer = TerminalRenderer() if play_mode == 3 else None
+    show = renderer is None
+    if renderer:
+        # AI reasoning output would scroll the animated frame
+        player1.verbose = player2.verbose = False
     game_continue = True
     turn_count = 0
+    shots = []
     while game_continue:
         turn_count += 1
-        take_turn(player1, player2, play_mode)
+        event = take_turn(player1, player2, play_mode, show)
+        shots.append((event.cell, event.outcome))
+        if renderer:
+            renderer.draw(spectator_frame(player1, player2, player1, event,
+                                          turn_count))
         if not player2.ships_left():
             show_banner()
             winner = player1
             game_continue = False
             continue
-        take_turn(player2, player1, play_mode)
+        event = take_turn(player2, player1, play_mode, show)
+        shots.append((event.cell, event.outcome))
+        if renderer:
+            renderer.draw(spectator_frame(player1, player2, player2, event,
+                                          turn_count))
         if not player1.ships_left():
             show_banner()
             winner = player2
@@ -214,16 +303,122 @@ def play_a_game(player1, player2, play_mode):
     print_all_boards(player1.name, player2.name,
                      player1.board.get_player_view(),
                      player2.board.get_player_view())
-    fall_behind = sum([row.count(VERTICAL_SHIP)+row.count(HORIZONTAL_SHIP) for row in player1.board.get_player_view(as_list=True)])
+    # unhit locations of player 1's fleet
+    fall_behind = sum(ship.remaining for ship in player1.board.ships)
     print("{} WINS!!!\n"
         "{} turns in total\n"
         "Losser falls behind {} grids. \n".format(winner.name, turn_count, fall_behind))
     if type(player1) != HumanPlayer:
         print("self.call_count={}".format(player1.call_count))
-    # print("Random seed: {}".format(seed))
-    # input("Hit ENTER to see final boards....\n")
+    if game_log is not None:
+        game_log.append(seed, (fleet_layout(player1), fleet_layout(player2)),
+                        shots)
     return turn_count, winner
 
+def play_seeded_game(seed, corpus_path=None, layout_index=0, record=False,
+                     config=DEFAULT_CONFIG):
+    """Play one test game (AI 2.1 vs AI 2.0) from a fixed random seed
+
+    Uses the headless engine so games run without any output.
+
+    Args:
+        seed (int): master seed of the game, see engine.play_seeded
+        corpus_path (str): fleet layout corpus; None places fleets at random
+        layout_index (int): corpus layout of player 1; player 2 gets the
+            next one
+        record (bool): also return the game as a gamelog.GameRecord
+        config (GameConfig): board size and fleet
+
+    Returns: tuple (turn_count, winner_name[, record])
+    """
+    make_players = partial(tournament_players, config=config)
+    layouts = (None, None)
+    if corpus_path:
+        corpus = open_corpus(corpus_path)
+        layouts = (corpus[layout_index], corpus[layout_index + 1])
+    if record:
+        result, game = play_recorded(seed, make_players, layouts=layouts)
+        return result.turns, result.winner.name, game
+    result = play_seeded(make_players, seed, layouts=layouts)
+    return result.turns, result.winner.name
+
+
+def run_tournament(num_games, base_seed=0, workers=None, corpus_path=None,
+                   first_layout=0, log_path=None, config=DEFAULT_CONFIG):
+    """Play test games across a process pool
+
+    Game i is seeded with base_seed + i, so results are identical to a
+    serial run with the same seeds whatever the number of workers. With a
+    corpus, game i uses layouts first_layout + 2i and first_layout + 2i + 1,
+    so every AI is measured against the same fleets.
+
+    Args:
+        num_games (int): number of games to play
+        base_seed (int): seed of the first game
+        workers (int): worker processes. Default os.cpu_count(); 1 runs
+            serially in this process
+        corpus_path (str): fleet layout corpus file (see corpus.py)
+        first_layout (int): first corpus layout used
+        log_path (str): append every game to this game log (see gamelog.py)
+        config (GameConfig): board size and fleet of every game
+
+    Returns:
+        List[tuple]: (turn_count, winner_name) per game, in seed order
+    """
+    seeds = range(base_seed, base_seed + num_games)
+    paths = [corpus_path] * num_games
+    indices = range(first_layout, first_layout + 2 * num_games, 2)
+    if corpus_path:
+        corpus = open_corpus(corpus_path)
+        if (corpus.size, corpus.ship_lengths) != (config.size,
+                                                  config.ship_lengths):
+            raise ValueError("corpus board or fleet does not match config")
+        if first_layout + 2 * num_games > len(corpus):
+            raise ValueError("corpus has fewer than {} layouts from {}"
+                             "".format(2 * num_games, first_layout))
+    # opening the log checks it now rather than after the games are played
+    game_log = (GameLog(log_path, config.size, config.ship_info)
+                if log_path else None)
+    records = [bool(log_path)] * num_games
+    configs = [config] * num_games
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers == 1 or num_games <= 1:
+            return log_results(map(play_seeded_game, seeds, paths, indices,
+                                   records, configs), game_log)
+        chunksize = max(1, num_games // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return log_results(pool.map(play_seeded_game, seeds, paths,
+                                        indices, records, configs,
+                                        chunksize=chunksize), game_log)
+    finally:
+        if game_log:
+            game_log.close()
+
+
+def log_results(results, game_log):
+    """Append each game to game_log as it arrives, keep (turns, winner)
+
+    Workers hand records back so only this process writes the log, and
+    each record is dropped once written, so memory does not grow with the
+    number of games logged.
+
+    Args:
+        results (Iterable[tuple]): play_seeded_game results, in seed order
+        game_log (GameLog): log to append to, or None if not logging
+
+    Returns:
+        List[tuple]: (turn_count, winner_name) per game
+    """
+    if game_log is None:
+        return list(results)
+    kept = []
+    for turns, winner, game in results:
+        game_log.append(*game)
+        kept.append((turns, winner))
+    return kept
+
+
 def main():
     """Run the console-based python game"""
     # start with a clear screen
@@ -240,25 +435,38 @@ def main():
         player1 = HumanPlayer()
         player2 = AIPlayer_2_1(1)
     elif play_mode==3:
-        player1 = AIPlayer_2_1(1)
-        player2 = AIPlayer_2_1(2)
+        seed = random.randrange(2**32)
+        print("Random seed: {}".format(seed))
+        player1 = AIPlayer_2_1(1, rng_stream(seed, 'player', 1))
+        player2 = AIPlayer_2_1(2, rng_stream(seed, 'player', 2))
     
     if play_mode<=3:
         play_a_game(player1, player2, play_mode)
         
     elif play_mode==4:
-        turns = []
-        winner_list = []
         N = int(input("Test number?\n"))
-        for i in range(N):
-            player1 = AIPlayer_2_1(1)
-            player2 = AIPlayer_2_0(2)
-            turn, winner = play_a_game(player1, player2, play_mode)
-            turns.append(turn)
-            winner_list.append(winner.name)
+        size = input("Board size (ENTER for {})?\n".format(DEFAULT_CONFIG.size))
+        size = int(size) if size else DEFAULT_CONFIG.size
+        # boards too large to index only store ships and guesses
+        config = GameConfig(size, sparse=size > INDEX_MAX_SIZE)
+        corpus_path = input("Fleet layout corpus (ENTER for random fleets)?\n")
+        first_layout = 0
+        if corpus_path:
+            first_layout = int(input("First layout?\n") or 0)
+        log_path = None
+        if size <= LOG_MAX_SIZE:
+            log_path = input("Game log file (ENTER for none)?\n")
+        base_seed = random.randrange(2**32)
+        print("Base seed: {}".format(base_seed))
+        results = run_tournament(N, base_seed, corpus_path=corpus_path,
+                                 first_layout=first_layout,
+                                 log_path=log_path, config=config)
+        turns = [turn for turn, _ in results]
+        winner_list = [winner for _, winner in results]
         print("Average turns: {}".format(sum(turns)/len(turns)))
-        player1_win_num = winner_list.count(player1.name)
-        print("{} vs {} result {}:{}".format(player1.name, player2.name, 
+        player1_name, player2_name = AIPlayer_2_1(1).name, AIPlayer_2_0(2).name
+        player1_win_num = winner_list.count(player1_name)
+        print("{} vs {} result {}:{}".format(player1_name, player2_name,
               player1_win_num, N-player1_win_num))
 
 if __name__ == '__main__':
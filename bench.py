@@ -0,0 +1,321 @@
+#!/usr/bin/python3
+"""Benchmark suite for the Battleship engine, AI players and full games.
+
+Run all benchmarks and write machine-readable results:
+
+    python bench.py -o results.json [--quick]
+
+Flag regressions between two result files (exit status 1 if any):
+
+    python bench.py compare old.json new.json [--threshold 0.10]
+
+Every benchmark reseeds the random module, so runs are repeatable.
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from contextlib import redirect_stdout
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+
+from battleship_ai import play_a_game
+from constants import BOARD_SIZE, SHIP_INFO
+from engine import place_fleet, play_headless
+from models import AIPlayer_2_0, AIPlayer_2_1, Board, Player, Ship
+from placement import random_fleets
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+SEED = 2016
+
+AI_PLAYERS = {
+    'AIPlayer_2_0': AIPlayer_2_0,
+    'AIPlayer_2_1': AIPlayer_2_1,
+}
+try:
+    from density import AIPlayer_Density, AIPlayer_Incremental
+except ImportError:
+    pass
+else:
+    AI_PLAYERS['AIPlayer_Incremental'] = AIPlayer_Incremental
+    try:
+        AIPlayer_Density(1)
+    except ImportError:
+        pass
+    else:
+        AI_PLAYERS['AIPlayer_Density'] = AIPlayer_Density
+
+PAIRINGS = [
+    ('AIPlayer_2_1', 'AIPlayer_2_0'),
+    ('AIPlayer_2_0', 'AIPlayer_2_0'),
+    ('AIPlayer_2_1', 'AIPlayer_2_1'),
+    ('AIPlayer_Incremental', 'AIPlayer_2_1'),
+    ('AIPlayer_Density', 'AIPlayer_2_1'),
+]
+
+
+def percentile(samples, fraction):
+    """Return the nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def best_of(func, repeat):
+    """Return the fastest of repeat calls to func, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def result(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit,
+            'higher_is_better': higher_is_better}
+
+
+def random_fleet_player(name="bench"):
+    """Return a Player with a randomly placed fleet"""
+    player = Player(name)
+    place_fleet(player)
+    return player
+
+
+def bench_board_guess(scale):
+    """Time Board.guess over every location of fresh boards"""
+    random.seed(SEED)
+    fleets = [random_fleet_player().ships for _ in range(20)]
+    cells = list(range(Board().size ** 2))
+    count = len(fleets) * len(cells)
+
+    def run():
+        for ships in fleets:
+            board = Board()
+            for ship in ships:
+                board.place_ship(Ship(ship.name, ship.size, ship.cells,
+                                      ship.direction))
+            for cell in cells:
+                board.guess(cell)
+
+    seconds = best_of(run, 3 * scale)
+    return {'board.guess': result(seconds / count * 1e9, 'ns/op', False)}
+
+
+def bench_place(scale):
+    """Time Board.verify_empty + Board.place_ship of whole fleets"""
+    random.seed(SEED)
+    fleets = [[(ship.name, ship.size, ship.cells, ship.direction)
+               for ship in random_fleet_player().ships] for _ in range(200)]
+
+    def run():
+        for fleet in fleets:
+            board = Board()
+            for name, size, cells, direction in fleet:
+                if board.verify_empty(cells):
+                    board.place_ship(Ship(name, size, cells, direction))
+
+    seconds = best_of(run, 3 * scale)
+    return {'board.verify_empty+place_ship': result(
+        seconds / (len(fleets) * len(SHIP_INFO)) * 1e9, 'ns/op', False)}
+
+
+def bench_render(scale):
+    """Time get_player_view / get_opponent_view on a half-shot board"""
+    random.seed(SEED)
+    board = random_fleet_player().board
+    cells = list(range(board.size ** 2))
+    random.shuffle(cells)
+    for cell in cells[:len(cells) // 2]:
+        board.guess(cell)
+    loops = 200
+    out = {}
+    for name, view in (('get_player_view', board.get_player_view),
+                       ('get_opponent_view', board.get_opponent_view)):
+        def run():
+            for _ in range(loops):
+                view()
+        out['board.' + name] = result(
+            best_of(run, 3 * scale) / loops * 1e6, 'us/op', False)
+
+    # a turn: one guess, then both views redrawn, on fresh boards
+    fleets = [random_fleet_player().ships for _ in range(3 * scale)]
+    best = float('inf')
+    for ships in fleets:
+        turn_board = Board()
+        for ship in ships:
+            turn_board.place_ship(Ship(ship.name, ship.size, ship.cells,
+                                       ship.direction))
+        start = time.perf_counter()
+        for cell in cells:
+            turn_board.guess(cell)
+            turn_board.get_opponent_view()
+            turn_board.get_player_view()
+        best = min(best, time.perf_counter() - start)
+    out['board.guess+views'] = result(best / len(cells) * 1e6, 'us/op',
+                                      False)
+    return out
+
+
+def bench_fleet_placement(scale):
+    """Time random fleet placement (engine.place_fleet, random_fleets)"""
+    random.seed(SEED)
+    loops = 200
+
+    def run():
+        for _ in range(loops):
+            place_fleet(Player("bench"))
+
+    lengths = [ship_size for _, ship_size in SHIP_INFO]
+
+    def run_batch():
+        random_fleets(loops, BOARD_SIZE, lengths)
+
+    return {'place_fleet': result(best_of(run, 3 * scale) / loops * 1e6,
+                                  'us/op', False),
+            'random_fleets': result(best_of(run_batch, 3 * scale) / loops
+                                    * 1e6, 'us/op', False)}
+
+
+def bench_ai_latency(scale):
+    """Time guess + deal_shoot_response of each AI, p50 and p99"""
+    out = {}
+    for name, player_class in AI_PLAYERS.items():
+        random.seed(SEED)
+        samples = []
+        for _ in range(20 * scale):
+            player = player_class(1)
+            player.verbose = False
+            opponent = random_fleet_player()
+            while opponent.ships_left():
+                start = time.perf_counter()
+                cell = player.guess()
+                player.guesses.append(cell)
+                event = opponent.board.guess(cell).event()
+                player.deal_shoot_response(event)
+                samples.append(time.perf_counter() - start)
+        out['ai.{}.p50'.format(name)] = result(
+            percentile(samples, 0.50) * 1e6, 'us/move', False)
+        out['ai.{}.p99'.format(name)] = result(
+            percentile(samples, 0.99) * 1e6, 'us/move', False)
+    return out
+
+
+def bench_games(scale):
+    """Measure end-to-end games per second for each AI pairing"""
+    out = {}
+    games = 20 * scale
+    for name1, name2 in PAIRINGS:
+        if name1 not in AI_PLAYERS or name2 not in AI_PLAYERS:
+            continue
+        class1, class2 = AI_PLAYERS[name1], AI_PLAYERS[name2]
+        label = '{}_vs_{}'.format(name1, name2)
+
+        random.seed(SEED)
+        start = time.perf_counter()
+        for _ in range(games):
+            play_headless(class1(1), class2(2))
+        out['headless.' + label] = result(
+            games / (time.perf_counter() - start), 'games/s', True)
+
+        random.seed(SEED)
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            for _ in range(games):
+                play_a_game(class1(1), class2(2), 4)
+        out['play_a_game.' + label] = result(
+            games / (time.perf_counter() - start), 'games/s', True)
+    return out
+
+
+BENCHMARKS = [bench_board_guess, bench_place, bench_render,
+              bench_fleet_placement, bench_ai_latency, bench_games]
+
+
+def run_all(scale=1):
+    """Run every benchmark, returns JSON-ready dict"""
+    results = {}
+    for bench in BENCHMARKS:
+        results.update(bench(scale))
+    return {
+        'meta': {
+            'seed': SEED,
+            'scale': scale,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(old, new, threshold=0.10):
+    """Compare two result dicts
+
+    Args:
+        old (dict): baseline results from run_all
+        new (dict): results to check
+        threshold (float): relative slowdown reported as a regression
+
+    Returns:
+        List[tuple]: (name, old value, new value, change, regressed) for
+            every benchmark present in both, change > 0 meaning better
+    """
+    rows = []
+    for name in sorted(set(old['results']) & set(new['results'])):
+        before = old['results'][name]
+        after = new['results'][name]
+        if not before['value'] or not after['value']:
+            continue
+        if before['higher_is_better']:
+            change = after['value'] / before['value'] - 1
+        else:
+            change = before['value'] / after['value'] - 1
+        rows.append((name, before['value'], after['value'], change,
+                     change < -threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command')
+    parser.add_argument('-o', '--output', help="write JSON results here")
+    parser.add_argument('--quick', action='store_true',
+                        help="fewer repetitions, for smoke runs")
+    cmp_parser = sub.add_parser('compare', help="flag regressions")
+    cmp_parser.add_argument('old')
+    cmp_parser.add_argument('new')
+    cmp_parser.add_argument('--threshold', type=float, default=0.10,
+                            help="relative slowdown to flag (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.old) as old_file, open(args.new) as new_file:
+            rows = compare(json.load(old_file), json.load(new_file),
+                           args.threshold)
+        for name, before, after, change, regressed in rows:
+            print("{:55} {:>12.3f} {:>12.3f} {:>+8.1%}{}".format(
+                name, before, after, change,
+                "  REGRESSION" if regressed else ""))
+        return 1 if any(row[4] for row in rows) else 0
+
+    results = run_all(scale=1 if args.quick else 5)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as out_file:
+            out_file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""Game configuration for the Battleship project.
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from collections import namedtuple
+
+from constants import BOARD_SIZE, SHIP_INFO
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+
+class GameConfig(namedtuple('GameConfig', 'size ship_info sparse')):
+    """Board size, fleet and board backend of a game
+
+    Args:
+        size (int): rows and columns of the square board
+        ship_info (List[tuple]): (ship_name, ship_size) of each ship
+        sparse (bool): use models.SparseBoard, which only stores ship and
+            guessed locations, instead of the bitmask Board
+
+    Attributes:
+        ship_lengths (tuple): ship_size of each ship, in fleet order
+    """
+    __slots__ = ()
+
+    def __new__(cls, size=BOARD_SIZE, ship_info=SHIP_INFO, sparse=False):
+        ship_info = tuple((name, length) for name, length in ship_info)
+        if size < 1:
+            raise ValueError("board size must be at least 1")
+        if any(not 1 <= length <= size for _, length in ship_info):
+            raise ValueError("every ship must fit on a {0}x{0} board"
+                             "".format(size))
+        if sum(length for _, length in ship_info) > size * size:
+            raise ValueError("fleet does not fit on a {0}x{0} board"
+                             "".format(size))
+        return super().__new__(cls, size, ship_info, sparse)
+
+    @property
+    def ship_lengths(self):
+        return tuple(length for _, length in self.ship_info)
+
+
+DEFAULT_CONFIG = GameConfig()
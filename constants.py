@@ -26,9 +26,6 @@ MISS = '.'
 HIT = '*'
 SUNK = '#'
 
-BOARD_HEADING = ("   " + " ".join(
-    [chr(c) for c in range(ord('A'), ord('A') + BOARD_SIZE)]))
-
 SHIP_INFO = [
     ("Aircraft Carrier", 5),
     ("Battleship", 4),
@@ -37,4 +34,8 @@ SHIP_INFO = [
     ("Patrol Boat", 2)
 ]
 
-FOUR_DIRECTION = [(0,-1), (-1,0), (0,1), (1,0)]
\ No newline at end of file
+FOUR_DIRECTION = [(0,-1), (-1,0), (0,1), (1,0)]
+
+# random checkerboard locations AIPlayer.shoot_random tries before any
+# untried location
+PARITY_TRIES = 50
\ No newline at end of file
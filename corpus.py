@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+"""Pre-generated corpus of fleet layouts for repeatable AI evaluation.
+
+A corpus file holds a fixed-width header followed by one fixed-width
+record per fleet layout. Each record is the placement id of every ship
+(see placement.PlacementIndex) as a little-endian unsigned short, so
+layout i starts at ``header_size + i * record_size`` and the file can be
+memory-mapped and shared by worker processes without unpickling.
+
+Generate a corpus:
+
+    python corpus.py layouts.bin 1000000 [--seed 2016]
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from functools import lru_cache
+import argparse
+import mmap
+import random
+import struct
+import sys
+
+from constants import BOARD_SIZE, SHIP_INFO
+from placement import placement_index, random_fleets
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+MAGIC = b'BSFL'
+VERSION = 1
+# magic, version, board size, number of ships, then one byte per ship length
+HEADER = struct.Struct('<4sBBB')
+# layouts generated and written at a time
+CHUNK = 10000
+# largest board whose placement ids all fit an unsigned short
+MAX_SIZE = 128
+
+
+def _record_struct(num_ships):
+    return struct.Struct('<{}H'.format(num_ships))
+
+
+def write_corpus(path, count, size=BOARD_SIZE, ship_info=SHIP_INFO,
+                 rng=random):
+    """Generate count random fleet layouts into a corpus file
+
+    Args:
+        path (str): file to write, replaced if it exists
+        count (int): number of layouts
+        size (int): board size
+        ship_info (List[tuple]): (ship_name, ship_size) of each ship
+        rng (random.Random): random source, default the random module
+    """
+    if size > MAX_SIZE:
+        raise ValueError("corpora hold boards up to {0}x{0}".format(MAX_SIZE))
+    lengths = [ship_size for _, ship_size in ship_info]
+    record = _record_struct(len(lengths))
+    with open(path, 'wb') as corpus_file:
+        corpus_file.write(HEADER.pack(MAGIC, VERSION, size, len(lengths)))
+        corpus_file.write(bytes(lengths))
+        for start in range(0, count, CHUNK):
+            fleets = random_fleets(min(CHUNK, count - start), size, lengths,
+                                   rng)
+            corpus_file.write(b''.join(record.pack(*fleet)
+                                       for fleet in fleets))
+
+
+class FleetCorpus():
+    """Read-only, memory-mapped view of a corpus file
+
+    Args:
+        path (str): corpus file from write_corpus
+
+    Attributes:
+        size (int): board size of every layout
+        ship_lengths (tuple): ship length of each record field
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as corpus_file:
+            self._map = mmap.mmap(corpus_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        magic, version, self.size, num_ships = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError("{} is not a fleet corpus".format(path))
+        self.ship_lengths = tuple(
+            self._map[HEADER.size:HEADER.size + num_ships])
+        self._record = _record_struct(num_ships)
+        self._offset = HEADER.size + num_ships
+        self._count = ((len(self._map) - self._offset)
+                       // self._record.size)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        """Return layout i: placement id of each ship"""
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("layout index out of range")
+        return self._record.unpack_from(self._map,
+                                        self._offset + i * self._record.size)
+
+    def layouts(self, start=0, stop=None):
+        """Yield layouts start to stop (exclusive)"""
+        stop = self._count if stop is None else min(stop, self._count)
+        for i in range(start, stop):
+            yield self[i]
+
+    def cells(self, i):
+        """Return the location indices of each ship of layout i"""
+        return [placement_index(self.size, length).cells[pid]
+                for length, pid in zip(self.ship_lengths, self[i])]
+
+    def mask(self, i):
+        """Return the bitmask of all ship locations of layout i"""
+        mask = 0
+        for length, pid in zip(self.ship_lengths, self[i]):
+            mask |= placement_index(self.size, length).masks[pid]
+        return mask
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@lru_cache(maxsize=None)
+def open_corpus(path):
+    """Return this process's shared FleetCorpus for path"""
+    return FleetCorpus(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help="corpus file to write")
+    parser.add_argument('count', type=int, help="number of layouts")
+    parser.add_argument('--seed', type=int, help="random seed")
+    args = parser.parse_args(argv)
+    write_corpus(args.path, args.count, rng=random.Random(args.seed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
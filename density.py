@@ -0,0 +1,272 @@
+#!/usr/bin/python3
+"""Probability-density AI players for the Battleship project.
+
+AIPlayer_Density requires NumPy.
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from collections import Counter
+import heapq
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from config import DEFAULT_CONFIG
+from constants import HIT, SUNK
+from models import AIPlayer_2_0
+from placement import placement_index
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+# extra weight per unsunk hit covered by a placement (target mode)
+HIT_WEIGHT = 100
+
+
+def placement_density(blocked, hits, ship_lengths):
+    """Count legal ship placements covering each board location
+
+    Rows and columns are handled together as running counts of blocked
+    locations and hits, so a placement is legal when its window adds no
+    blocked location. Weights are spread over each window with a
+    difference array, which makes every ship length a few whole-board
+    operations.
+
+    Args:
+        blocked (ndarray[bool]): locations no ship can cover (miss, sunk)
+        hits (ndarray[bool]): hit locations of ships not yet sunk
+        ship_lengths (List[int]): lengths of the ships still afloat
+
+    Returns:
+        ndarray[int]: weighted placement count per location. Placements
+            covering k unsunk hits weigh 1 + k * HIT_WEIGHT.
+    """
+    size = blocked.shape[0]
+    # horizontal placements along the rows of [0], vertical along [1]
+    shape = (2, size, size + 1)
+    run_blocked = np.zeros(shape, dtype=np.int32)
+    np.cumsum(np.stack((blocked, blocked.T)), axis=2,
+              out=run_blocked[:, :, 1:])
+    # hunting, no placement covers a hit and every weight is 1
+    targeting = hits.any()
+    if targeting:
+        run_hits = np.zeros(shape, dtype=np.int32)
+        np.cumsum(np.stack((hits, hits.T)), axis=2, out=run_hits[:, :, 1:])
+    diff = np.zeros(shape, dtype=np.int32)
+    for length, number in Counter(ship_lengths).items():
+        span = size - length + 1
+        if span <= 0:
+            continue
+        # window [anchor, anchor + length) for anchors 0 .. span - 1
+        weight = run_blocked[:, :, length:] == run_blocked[:, :, :span]
+        if targeting:
+            valid = weight
+            weight = run_hits[:, :, length:] - run_hits[:, :, :span]
+            weight *= HIT_WEIGHT
+            weight += 1
+            weight *= valid
+        if number > 1:
+            weight = weight * number
+        diff[:, :, :span] += weight
+        diff[:, :, length:] -= weight
+    density = np.cumsum(diff[:, :, :size], axis=2)
+    return density[0] + density[1].T
+
+
+class AIPlayer_Density(AIPlayer_2_0):
+    """AIPlayer firing at the location with the highest placement density
+
+    What is known of the opponent board is kept as boolean arrays,
+    updated by each shot event, so a move only counts placements.
+
+    Attributes:
+        shot (ndarray[bool]): opponent locations shot at
+        blocked (ndarray[bool]): misses and sunk ship locations
+        hits (ndarray[bool]): hits on ships not yet sunk
+    """
+
+    def __init__(self, name, rng=None, config=DEFAULT_CONFIG):
+        if np is None:
+            raise ImportError("AIPlayer_Density requires NumPy")
+        AIPlayer_2_0.__init__(self, name, rng, config)
+        shape = (config.size, config.size)
+        self.shot = np.zeros(shape, dtype=bool)
+        self.blocked = np.zeros(shape, dtype=bool)
+        self.hits = np.zeros(shape, dtype=bool)
+
+    def guess(self):
+        density = placement_density(self.blocked, self.hits,
+                                    self.opponent_ships)
+        density[self.shot] = -1
+        best = np.flatnonzero(density == density.max())
+        cell = int(self.rng.choice(best))
+        self.instrument.count("density")
+        return cell
+
+    def deal_shoot_response(self, event):
+        # guess never uses the AIPlayer_2_0 target queue, so skip it
+        self.record_shot(event)
+        self.shot.flat[event.cell] = True
+        if event.outcome == SUNK:
+            cells = list(event.ship_cells)
+            self.hits.flat[cells] = False
+            self.blocked.flat[cells] = True
+            self.opponent_ships.remove(len(cells))
+        elif event.outcome == HIT:
+            self.hits.flat[event.cell] = True
+        else:
+            self.blocked.flat[event.cell] = True
+
+
+class PlacementCounts():
+    """Ship-placement counts per board location, updated incrementally
+
+    Every placement of each remaining ship length starts alive. Blocking a
+    location (a miss or a sunk ship) kills only the placements covering
+    it, and removing a sunk ship drops one copy of its length, so each
+    update costs time proportional to the placements it touches.
+
+    Args:
+        size (int): board size
+        ship_lengths (List[int]): lengths of the opponent's ships
+        rng (random.Random): random source of the tie-break
+
+    Attributes:
+        counts (List[int]): alive placements covering each location,
+            counting every ship of a length separately
+    """
+
+    def __init__(self, size, ship_lengths, rng=random):
+        self.size = size
+        self.lengths = Counter(ship_lengths)
+        # length -> list of placements, each a tuple of location indices
+        self.placements = {}
+        # length -> per location, ids of the placements covering it
+        self.cover = {}
+        # length -> ids of placements not yet ruled out
+        self.alive = {}
+        self.counts = [0] * (size * size)
+        self.blocked = bytearray(size * size)
+        self.shot = bytearray(size * size)
+        for length, number in self.lengths.items():
+            index = placement_index(size, length)
+            for cells in index.cells:
+                for cell in cells:
+                    self.counts[cell] += number
+            self.placements[length] = index.cells
+            self.cover[length] = index.cover
+            self.alive[length] = set(range(len(index)))
+        # random tie-break fixed per location, so equal counts are not
+        # always resolved towards the top left corner
+        self._tiebreak = [rng.random() for _ in range(size * size)]
+        self._heap = [(-count, self._tiebreak[cell], cell)
+                      for cell, count in enumerate(self.counts)]
+        heapq.heapify(self._heap)
+
+    def _discount(self, cells, number):
+        """Subtract number from the count of each location"""
+        for cell in cells:
+            self.counts[cell] -= number
+            heapq.heappush(self._heap, (-self.counts[cell],
+                                        self._tiebreak[cell], cell))
+
+    def block(self, cell):
+        """Rule out every placement covering a location"""
+        if self.blocked[cell]:
+            return
+        self.blocked[cell] = 1
+        for length, number in self.lengths.items():
+            alive = self.alive[length]
+            placements = self.placements[length]
+            for pid in self.cover[length][cell]:
+                if pid in alive:
+                    alive.remove(pid)
+                    self._discount(placements[pid], number)
+
+    def remove_ship(self, length):
+        """Drop one ship of length from the remaining fleet"""
+        placements = self.placements[length]
+        for pid in self.alive[length]:
+            self._discount(placements[pid], 1)
+        self.lengths[length] -= 1
+        if not self.lengths[length]:
+            del self.lengths[length]
+
+    def best(self):
+        """Return the unshot location covered by the most placements"""
+        heap = self._heap
+        while heap:
+            neg_count, _, cell = heap[0]
+            if not self.shot[cell] and -neg_count == self.counts[cell]:
+                return cell
+            # stale entry: count has changed or location was shot
+            heapq.heappop(heap)
+        return None
+
+    def best_target(self, hits):
+        """Return the unshot location best explaining unsunk hits
+
+        Scores every alive placement covering a hit, so a placement
+        covering several hits counts once per hit.
+
+        Args:
+            hits (List[int]): locations hit on ships not yet sunk
+
+        Returns:
+            int: location index, or None if no placement covers a hit
+        """
+        scores = Counter()
+        for hit in hits:
+            for length, number in self.lengths.items():
+                alive = self.alive[length]
+                placements = self.placements[length]
+                for pid in self.cover[length][hit]:
+                    if pid in alive:
+                        for cell in placements[pid]:
+                            if not self.shot[cell]:
+                                scores[cell] += number
+        if not scores:
+            return None
+        return max(scores, key=lambda cell: (scores[cell],
+                                             self._tiebreak[cell]))
+
+
+class AIPlayer_Incremental(AIPlayer_2_0):
+    """AIPlayer 2.0 hunting by incrementally updated placement counts"""
+
+    def __init__(self, name, rng=None, config=DEFAULT_CONFIG):
+        AIPlayer_2_0.__init__(self, name, rng, config)
+        self.placement_counts = PlacementCounts(config.size,
+                                                self.opponent_ships, self.rng)
+
+    def guess(self):
+        counts = self.placement_counts
+        cell = None
+        if self.hit_record:
+            cell = counts.best_target(self.hit_record)
+        if cell is None:
+            self.instrument.count("hunt")
+            cell = counts.best()
+        else:
+            self.instrument.count("target")
+        counts.shot[cell] = 1
+        return cell
+
+    def deal_shoot_response(self, event):
+        self.record_shot(event)
+        counts = self.placement_counts
+        if event.outcome == SUNK:
+            for sunk in event.ship_cells:
+                if sunk in self.hit_record:
+                    self.hit_record.remove(sunk)
+                counts.block(sunk)
+            self.opponent_ships.remove(len(event.ship_cells))
+            counts.remove_ship(len(event.ship_cells))
+        elif event.outcome == HIT:
+            self.hit_record.append(event.cell)
+        else:
+            counts.block(event.cell)
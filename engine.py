@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+"""Headless Battleship game engine used for simulation.
+
+Runs complete games between two Player objects without formatting or
+writing any text, returning a structured GameResult instead.
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from collections import Counter, namedtuple
+import hashlib
+import random
+
+from instrument import clock
+from models import Ship
+from placement import (INDEX_MAX_SIZE, placement_at, random_fleet,
+                       sparse_fleet)
+from utils import ship_cells
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+# winner (Player): player that sank the opponent's fleet
+# turns (int): number of rounds played (one round = one guess each)
+# shots (List[tuple]): (player_name, cell, result) in play order, cell is
+#     the location index and result the MISS, HIT or SUNK board symbol
+# call_counts (dict): player name -> Counter of AI heuristic calls
+# stats (dict): player name -> Instrumentation.export() for this game
+GameResult = namedtuple('GameResult',
+                        'winner turns shots call_counts stats')
+
+
+def place_fleet(player, ship_info=None, layout=None):
+    """Place player's ships without any output
+
+    Args:
+        player (Player): player whose fleet is placed
+        ship_info (List[tuple]): (ship_name, ship_size) of each ship,
+            default player.config.ship_info
+        layout (List[int]): placement id of each ship, e.g. one fleet from
+            placement.random_fleets; default asks player.direction_anchor
+    """
+    if ship_info is None:
+        ship_info = player.config.ship_info
+    size = player.board.size
+    if layout is not None:
+        for (ship_name, ship_size), pid in zip(ship_info, layout):
+            direction, cells = placement_at(size, ship_size, pid)
+            ship = Ship(ship_name, ship_size, cells, direction.upper())
+            player.add_ship(ship)
+            player.board.place_ship(ship)
+        return
+    while not _place_each(player, ship_info):
+        # earlier ships left no room: draw the whole fleet again
+        player.clear_fleet()
+
+
+def _place_each(player, ship_info):
+    """Place ships one by one from player.direction_anchor
+
+    Returns:
+        bool: False if a ship had no free placement left
+    """
+    size = player.board.size
+    for ship_name, ship_size in ship_info:
+        while True:
+            placement = player.direction_anchor((ship_name, ship_size))
+            if placement is None:
+                return False
+            direction, anchor = placement
+            cells = ship_cells(anchor, ship_size, direction, size)
+            if cells and player.board.verify_empty(cells):
+                break
+        ship = Ship(ship_name, ship_size, cells, direction)
+        player.add_ship(ship)
+        player.board.place_ship(ship)
+    return True
+
+
+def fire(player, opponent):
+    """Apply one guess by player against opponent
+
+    When player.instrument is enabled, the decision, board update and
+    knowledge update phases are timed and the whole move is added to the
+    'move' latency histogram.
+
+    Returns:
+        ShotEvent: what player learns from the guess
+    """
+    instrument = player.instrument
+    if not instrument.enabled:
+        cell = player.guess()
+        # remember guessed locations
+        player.guesses.append(cell)
+        event = opponent.board.guess(cell).event()
+        player.deal_shoot_response(event)
+        return event
+
+    start = clock()
+    cell = player.guess()
+    player.guesses.append(cell)
+    decided = clock()
+    event = opponent.board.guess(cell).event()
+    updated = clock()
+    player.deal_shoot_response(event)
+    done = clock()
+    instrument.add_time('decision', decided - start)
+    instrument.add_time('board_update', updated - decided)
+    instrument.add_time('knowledge_update', done - updated)
+    instrument.observe('move', done - start)
+    instrument.count('outcome.' + event.outcome)
+    return event
+
+
+def play_headless(player1, player2, ship_info=None, instrument=False,
+                  layouts=(None, None)):
+    """Play a complete game between two players without any I/O
+
+    Both players are switched to non-verbose. player1 moves first.
+
+    Args:
+        player1 (Player): first player (an AI; human input is not silenced)
+        player2 (Player): second player
+        ship_info (List[tuple]): (ship_name, ship_size) of each ship,
+            default each player's config.ship_info
+        instrument (bool): enable both players' phase timers and
+            latency histograms
+        layouts (tuple): fleet layout of player1 and player2, see
+            place_fleet; None places that fleet at random
+
+    Returns:
+        GameResult: winner, turns, shot sequence, call counts and stats
+    """
+    player1.verbose = player2.verbose = False
+    if instrument:
+        player1.instrument.enabled = player2.instrument.enabled = True
+    place_fleet(player1, ship_info, layouts[0])
+    place_fleet(player2, ship_info, layouts[1])
+
+    shots = []
+    turns = 0
+    winner = None
+    while winner is None:
+        turns += 1
+        for player, opponent in ((player1, player2), (player2, player1)):
+            event = fire(player, opponent)
+            shots.append((player.name, event.cell, event.outcome))
+            if not opponent.ships_left():
+                winner = player
+                break
+
+    call_counts = {player.name: Counter(player.call_count)
+                   for player in (player1, player2)}
+    stats = {player.name: player.instrument.export()
+             for player in (player1, player2)}
+    return GameResult(winner, turns, shots, call_counts, stats)
+
+
+def rng_stream(seed, *keys):
+    """Return an independent random stream derived from a master seed
+
+    The stream depends only on seed and keys (hashed with SHA-256, not
+    Python's per-process string hash), so it is the same in every worker
+    process whatever the scheduling.
+
+    Args:
+        seed (int): master seed
+        keys: what the stream is for, e.g. ('player', 1)
+
+    Returns:
+        random.Random: seeded generator
+    """
+    digest = hashlib.sha256(repr((seed,) + keys).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], 'little'))
+
+
+def play_seeded(make_players, seed, ship_info=None, layouts=(None, None)):
+    """Play a headless game that depends only on seed and the fleets
+
+    Each fleet not given is drawn from its own stream, and each player
+    gets its own stream, all derived from seed with rng_stream. The
+    random module is never used, so the same seed and fleets replay the
+    same shots in any process, whether the fleets came from a corpus or
+    were drawn here.
+
+    Args:
+        make_players (callable): make_players(rng1, rng2) returns
+            (player1, player2) using those random streams
+        seed (int): master seed of the game
+        ship_info (List[tuple]): (ship_name, ship_size) of each ship,
+            default player1.config.ship_info
+        layouts (tuple): fleet layout of player1 and player2, see
+            place_fleet; None draws that fleet at random
+
+    Returns:
+        GameResult: as play_headless
+    """
+    player1, player2 = make_players(rng_stream(seed, 'player', 1),
+                                    rng_stream(seed, 'player', 2))
+    if ship_info is None:
+        ship_info = player1.config.ship_info
+    lengths = [ship_size for _, ship_size in ship_info]
+    size = player1.board.size
+    draw_fleet = random_fleet if size <= INDEX_MAX_SIZE else sparse_fleet
+    layouts = [draw_fleet(size, lengths, rng_stream(seed, 'fleet', n))
+               if layout is None else layout
+               for n, layout in enumerate(layouts, 1)]
+    return play_headless(player1, player2, ship_info, layouts=layouts)
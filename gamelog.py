@@ -0,0 +1,193 @@
+#!/usr/bin/python3
+"""Compact binary log of finished Battleship games.
+
+A log file starts with a header (magic, version, board size and the
+ship lengths of every fleet) followed by one record per game:
+
+    seed            unsigned long long
+    shot count      unsigned short
+    fleets          one unsigned short placement id per ship, player 1
+                    then player 2 (see placement.PlacementIndex)
+    shots           one unsigned short per shot, cell << 2 | outcome code
+
+all little-endian. Shots alternate between the players starting with
+player 1, so the shooter, the turn count and the winner (the last
+shooter) are implied by the shot sequence.
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from collections import namedtuple
+import os
+import struct
+
+from constants import BOARD_SIZE, HIT, MISS, SHIP_INFO, SUNK
+from placement import placement_index
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+MAGIC = b'BSGR'
+VERSION = 1
+# magic, version, board size, number of ships, then one byte per ship length
+HEADER = struct.Struct('<4sBBB')
+# seed, shot count
+RECORD = struct.Struct('<QH')
+# largest board whose cells (two bits shifted) and placement ids fit a short
+MAX_SIZE = 64
+
+OUTCOMES = (MISS, HIT, SUNK)
+OUTCOME_CODE = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+
+# seed (int): random seed the game was played from
+# layouts (tuple): placement ids of player 1's and player 2's fleets
+# shots (List[tuple]): (cell, outcome) in play order, outcome is the MISS,
+#     HIT or SUNK board symbol; even positions are player 1's shots
+GameRecord = namedtuple('GameRecord', 'seed layouts shots')
+
+
+def fleet_layout(player):
+    """Return the placement id of each of player's ships, in fleet order"""
+    size = player.board.size
+    return tuple(placement_index(size, ship.size).by_anchor[
+        (ship.cells[0], ship.direction[0].lower())] for ship in player.ships)
+
+
+def check_log(path, size, ship_info):
+    """Raise ValueError unless GameLog can append these games to path
+
+    The board must fit the record format, and an existing log must hold
+    games of the same board size and fleet.
+
+    Args:
+        path (str): log file, need not exist
+        size (int): board size
+        ship_info (List[tuple]): (ship_name, ship_size) of each ship
+    """
+    if size > MAX_SIZE:
+        raise ValueError("game logs hold boards up to {0}x{0}"
+                         "".format(MAX_SIZE))
+    ship_lengths = tuple(ship_size for _, ship_size in ship_info)
+    if (os.path.exists(path) and os.path.getsize(path) and
+            read_header(path) != (size, ship_lengths)):
+        raise ValueError("{} holds games of another board size or "
+                         "fleet".format(path))
+
+
+class GameLog():
+    """Append-only writer of game records
+
+    Opens path for appending and writes the header if the file is new.
+
+    Args:
+        path (str): log file
+        size (int): board size
+        ship_info (List[tuple]): (ship_name, ship_size) of each ship
+    """
+
+    def __init__(self, path, size=BOARD_SIZE, ship_info=SHIP_INFO):
+        check_log(path, size, ship_info)
+        self.ship_lengths = tuple(ship_size for _, ship_size in ship_info)
+        self._fleets = struct.Struct('<{}H'.format(2 * len(self.ship_lengths)))
+        new = not os.path.exists(path) or not os.path.getsize(path)
+        self._file = open(path, 'ab')
+        if new:
+            self._file.write(HEADER.pack(MAGIC, VERSION, size,
+                                         len(self.ship_lengths)))
+            self._file.write(bytes(self.ship_lengths))
+
+    def append(self, seed, layouts, shots):
+        """Write one game
+
+        Args:
+            seed (int): random seed of the game
+            layouts (tuple): placement ids of both fleets, see fleet_layout
+            shots (Iterable[tuple]): (cell, outcome) in play order
+        """
+        codes = [cell << 2 | OUTCOME_CODE[outcome] for cell, outcome in shots]
+        self._file.write(RECORD.pack(seed, len(codes)) +
+                         self._fleets.pack(*layouts[0], *layouts[1]) +
+                         struct.pack('<{}H'.format(len(codes)), *codes))
+
+    def append_result(self, seed, player1, player2, result):
+        """Write a GameResult from engine.play_headless"""
+        self.append(seed, (fleet_layout(player1), fleet_layout(player2)),
+                    [(cell, outcome) for _, cell, outcome in result.shots])
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_header(log_file, path):
+    """Read the header at the start of an open log file
+
+    Returns: tuple (size, ship_lengths)
+    """
+    head = log_file.read(HEADER.size)
+    if len(head) < HEADER.size:
+        raise ValueError("{} is not a game log".format(path))
+    magic, version, size, num_ships = HEADER.unpack(head)
+    ship_lengths = tuple(log_file.read(num_ships))
+    if (magic != MAGIC or version != VERSION or
+            len(ship_lengths) != num_ships):
+        raise ValueError("{} is not a game log".format(path))
+    return size, ship_lengths
+
+
+def read_header(path):
+    """Return the board size and ship lengths every game of a log uses
+
+    Args:
+        path (str): log file from GameLog
+
+    Returns: tuple (size, ship_lengths)
+        size (int): board size
+        ship_lengths (tuple): length of each ship, in fleet order
+    """
+    with open(path, 'rb') as log_file:
+        return _read_header(log_file, path)
+
+
+def read_games(path):
+    """Stream the games of a log file one at a time
+
+    Args:
+        path (str): log file from GameLog
+
+    Yields:
+        GameRecord: each game, in the order written
+
+    Raises:
+        ValueError: after the last whole game, if the log ends part way
+            through a record
+    """
+    with open(path, 'rb') as log_file:
+        _, ship_lengths = _read_header(log_file, path)
+        num_ships = len(ship_lengths)
+        fleets = struct.Struct('<{}H'.format(2 * num_ships))
+        games = 0
+        while True:
+            head = log_file.read(RECORD.size + fleets.size)
+            if not head:
+                return
+            if len(head) < RECORD.size + fleets.size:
+                break
+            seed, num_shots = RECORD.unpack_from(head)
+            layouts = fleets.unpack_from(head, RECORD.size)
+            body = log_file.read(2 * num_shots)
+            if len(body) < 2 * num_shots:
+                break
+            codes = struct.unpack('<{}H'.format(num_shots), body)
+            games += 1
+            yield GameRecord(seed, (layouts[:num_ships], layouts[num_ships:]),
+                             [(code >> 2, OUTCOMES[code & 3])
+                              for code in codes])
+    # a run killed while appending leaves part of its last record
+    raise ValueError("{} ends in a partial game record after {} games"
+                     "".format(path, games))
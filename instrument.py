@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""Hot-path instrumentation for Battleship players and the game engine.
+
+Every Player owns an Instrumentation. Branch counters (the old
+AIPlayer.call_count) are always kept since they cost one Counter
+increment where a heuristic fires. Phase timers and latency histograms
+are only recorded while the instrumentation is enabled; the engine
+checks ``enabled`` once per shot and otherwise skips all timing.
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from collections import Counter, defaultdict
+import time
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+# phases of one shot timed by the engine
+PHASES = ('decision', 'board_update', 'knowledge_update')
+
+clock = time.perf_counter
+
+
+class Instrumentation():
+    """Branch counters, per-phase timers and latency histograms
+
+    Args:
+        enabled (bool): record timers and histograms
+
+    Attributes:
+        counters (Counter): branch name -> times taken
+        timers (defaultdict): phase name -> [total seconds, calls]
+        histograms (defaultdict): name -> Counter of power-of-two
+            microsecond buckets; bucket k holds samples below 2**k us
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = Counter()
+        self.timers = defaultdict(lambda: [0.0, 0])
+        self.histograms = defaultdict(Counter)
+
+    def count(self, name, amount=1):
+        """Add to a branch counter"""
+        self.counters[name] += amount
+
+    def add_time(self, phase, seconds):
+        """Add one timed call of a phase"""
+        timer = self.timers[phase]
+        timer[0] += seconds
+        timer[1] += 1
+
+    def observe(self, name, seconds):
+        """Add a latency sample to a histogram"""
+        self.histograms[name][int(seconds * 1e6).bit_length()] += 1
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
+        self.histograms.clear()
+
+    def export(self):
+        """Return a JSON-ready dict of everything recorded"""
+        return {
+            'counters': dict(self.counters),
+            'timers': {phase: {'total_s': total, 'calls': calls}
+                       for phase, (total, calls) in self.timers.items()},
+            'histograms': {name: {str(2 ** bucket): count
+                                  for bucket, count in sorted(hist.items())}
+                           for name, hist in self.histograms.items()},
+        }
+
+
+def aggregate(exports):
+    """Merge dicts from Instrumentation.export, e.g. across games
+
+    Args:
+        exports (Iterable[dict]): per-game exports
+
+    Returns:
+        dict: same layout, counters, timers and histograms summed
+    """
+    counters = Counter()
+    timers = defaultdict(lambda: {'total_s': 0.0, 'calls': 0})
+    histograms = defaultdict(Counter)
+    for export in exports:
+        counters.update(export['counters'])
+        for phase, timer in export['timers'].items():
+            timers[phase]['total_s'] += timer['total_s']
+            timers[phase]['calls'] += timer['calls']
+        for name, hist in export['histograms'].items():
+            histograms[name].update(hist)
+    return {
+        'counters': dict(counters),
+        'timers': dict(timers),
+        'histograms': {name: dict(sorted(hist.items(),
+                                         key=lambda item: int(item[0])))
+                       for name, hist in histograms.items()},
+    }
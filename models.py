@@ -3,10 +3,14 @@
 
 Project 2 - Treehouse Techdegree - Python Web Development
 """
+from config import DEFAULT_CONFIG
 from constants import *
+from instrument import Instrumentation
+from placement import (SPARSE_TRIES, dilate, free_placements, placement_at,
+                       placement_index, random_free_placement)
 from utils import *
 import random
-from collections import Counter
+from collections import OrderedDict, defaultdict, namedtuple
 import pickle
 
 __author__ = "Chris Freeman"
@@ -14,121 +18,474 @@ __copyright__ = "Copyright 2016, Chris Freeman"
 __license__ = "MIT"
 
 
+# What the shooter learns from one guess.
+# cell (int): location index guessed
+# outcome (str): MISS, HIT or SUNK
+# ship_id (int): index of the sunk ship on the board, None unless SUNK
+# ship_cells (tuple[int]): locations of the sunk ship, empty unless SUNK
+ShotEvent = namedtuple('ShotEvent', 'cell outcome ship_id ship_cells')
+
+
+class ShotResult():
+    """Outcome of one guess on a Board
+
+    The human readable message is only formatted when asked for.
+
+    Args:
+        cell (int): location index guessed
+        outcome (str): MISS, HIT or SUNK
+        ship (Ship): ship at the location, None on a miss
+        ship_id (int): index of ship on the board, None on a miss
+        board_size (int): size of the board guessed
+
+    Attributes:
+        message (str): "Guess [A1]: You Missed!" style message
+    """
+    __slots__ = ('cell', 'outcome', 'ship', 'ship_id', 'board_size')
+
+    def __init__(self, cell, outcome, ship=None, ship_id=None,
+                 board_size=BOARD_SIZE):
+        self.cell = cell
+        self.outcome = outcome
+        self.ship = ship
+        self.ship_id = ship_id
+        self.board_size = board_size
+
+    @property
+    def message(self):
+        coord = cell_to_coord(self.cell, self.board_size)
+        if self.outcome == MISS:
+            return "Guess [{}]: You Missed!\n".format(coord)
+        elif self.outcome == HIT:
+            return "Guess [{}]: You Hit!!\n".format(coord)
+        return "Guess [{}]: You SUNK my {}\n".format(coord, self.ship.name)
+
+    def __str__(self):
+        return self.message
+
+    def event(self):
+        """Return the ShotEvent the shooter may see (no unsunk ship info)"""
+        if self.outcome == SUNK:
+            return ShotEvent(self.cell, SUNK, self.ship_id, self.ship.cells)
+        return ShotEvent(self.cell, self.outcome, None, ())
+
+
+class TargetQueue():
+    """Locations an AI wants to try next, front first
+
+    Push, pop, removal and membership are O(1). Locations only ever enter
+    at the front, so queue order is the order of their (decreasing)
+    stamps, which lets a row or column be promoted without scanning the
+    whole queue.
+
+    Args:
+        size (int): board size
+    """
+
+    def __init__(self, size=BOARD_SIZE):
+        self.size = size
+        # OrderedDict: location index -> stamp, front first
+        self._queue = OrderedDict()
+        self._rows = defaultdict(set)
+        self._cols = defaultdict(set)
+        self._stamp = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __contains__(self, cell):
+        return cell in self._queue
+
+    def __iter__(self):
+        return iter(self._queue)
+
+    def __repr__(self):
+        return repr(list(self._queue))
+
+    def push_front(self, cell):
+        """Add location at the front, moving it there if already queued"""
+        if cell not in self._queue:
+            row, col = divmod(cell, self.size)
+            self._rows[row].add(cell)
+            self._cols[col].add(cell)
+        self._stamp -= 1
+        self._queue[cell] = self._stamp
+        self._queue.move_to_end(cell, last=False)
+
+    def _forget(self, cell):
+        row, col = divmod(cell, self.size)
+        self._rows[row].discard(cell)
+        self._cols[col].discard(cell)
+
+    def pop(self):
+        """Remove and return the front location"""
+        cell, _ = self._queue.popitem(last=False)
+        self._forget(cell)
+        return cell
+
+    def remove(self, cell):
+        """Remove location if queued"""
+        if self._queue.pop(cell, None) is not None:
+            self._forget(cell)
+
+    def clear(self):
+        self._queue.clear()
+        self._rows.clear()
+        self._cols.clear()
+
+    def promote(self, x, y, direction):
+        """Move queued locations on the axis of the last two hits forward
+
+        Args:
+            x (int): row offset of the last hit
+            y (int): column offset of the last hit
+            direction (tuple): (dx, dy) between the last two hits; the row
+                of x is promoted when dx is 0, else the column of y when
+                dy is 0
+
+        Returns:
+            List[int]: promoted locations, the last one now at the front
+        """
+        if not direction[0]:
+            line = self._rows.get(x, ())
+        elif not direction[1]:
+            line = self._cols.get(y, ())
+        else:
+            return []
+        promoted = sorted(line, key=self._queue.__getitem__)
+        for cell in promoted:
+            self.push_front(cell)
+        return promoted
+
+
 class Board():
     """Battleship Board
 
-    Board is a square array of Locations
+    Board is a square grid tracked as integer bitmasks. Location
+    (row, col) maps to bit ``row * size + col``; each placed ship keeps
+    its own occupancy mask so a guess costs a handful of AND/OR ops.
+
+    Display rows are rendered once and cached per view; a guess or
+    placement only marks the rows it touches for re-rendering.
+
+    Attributes:
+        ships (List[Ship]): ships placed on the board, index is the ship id
+        ship_masks (List[int]): occupancy mask per ship, parallel to ships
+        occupied (int): union of all ship masks
+        hits (int): locations guessed that held a ship
+        misses (int): locations guessed that were empty
+        sunk (int): locations of ships that have been sunk
+        afloat (int): number of ships not sunk yet
     """
 
     def __init__(self, size=BOARD_SIZE):
         """initialize board to correct size"""
         self.size = size
-        self.grid = []
-        # Add 'size' number of rows
-        for row in range(self.size):
-            # Add 'size' number of Locations per row
-            new_row = []
-            for col in range(self.size):
-                new_row.append(Location(offset_to_coord(row, col)))
-            self.grid.append(new_row)
+        self.ships = []
+        self.ship_masks = []
+        # dict: location index -> id of the ship covering it
+        self.ship_at = {}
+        self.occupied = 0
+        self.hits = 0
+        self.misses = 0
+        self.sunk = 0
+        self.afloat = 0
+        # cached display rows per view (True reveals ships), None if stale
+        self._lines = {True: [None] * size, False: [None] * size}
+
+    def _mask(self, cells):
+        """Return the bitmask covering all location indices"""
+        mask = 0
+        for cell in cells:
+            mask |= 1 << cell
+        return mask
+
+    def _row_cells(self, row, reveal):
+        """Return the location symbols of one row"""
+        size = self.size
+        start = row * size
+        row_mask = (1 << size) - 1
+        cells = [EMPTY] * size
+        for col in iter_bits(self.misses >> start & row_mask):
+            cells[col] = MISS
+        for col in iter_bits(self.occupied >> start & row_mask):
+            cell = start + col
+            if self.sunk >> cell & 1:
+                cells[col] = SUNK
+            elif self.hits >> cell & 1:
+                cells[col] = HIT
+            elif reveal:
+                cells[col] = self.ships[self.ship_at[cell]].char
+        return cells
+
+    def _touch(self, cells):
+        """Mark the display rows of location indices for re-rendering"""
+        for cell in cells:
+            row = cell // self.size
+            self._lines[True][row] = self._lines[False][row] = None
+
+    def _view(self, reveal, as_list):
+        """Build board view as list of rows or list of display strings"""
+        size = self.size
+        if as_list:
+            return [self._row_cells(row, reveal) for row in range(size)]
+        lines = self._lines[reveal]
+        label_width = len(str(size))
+        # right-align symbols under multi-letter column labels
+        pad = " " * (len(column_label(size - 1)) - 1)
+        for row, line in enumerate(lines):
+            if line is None:
+                lines[row] = (str(row + 1).rjust(label_width) + " " + pad +
+                              (" " + pad).join(self._row_cells(row, reveal)))
+        return [board_heading(size)] + lines + [""]
 
     def get_player_view(self, as_list = False):
         """Return player view of game board (with ships revealed)"""
-        if as_list:
-            view = [[location.player_view() for location in row] for row in self.grid]
-        else:
-            view = [BOARD_HEADING]
-            row_num = 1
-            for row in self.grid:
-                view.append(str(row_num).rjust(2) + " " + " ".join(
-                    [location.player_view() for location in row]))
-                row_num += 1
-            view.append("")
-        return view
+        return self._view(True, as_list)
 
     def get_opponent_view(self, as_list = False):
         """Return opponent view of game board (without revealing ships)"""
-        if as_list:
-            view = [[location.opponent_view() for location in row] for row in self.grid]
-        else:
-            view = [BOARD_HEADING]
-            row_num = 1
-            for row in self.grid:
-                view.append(str(row_num).rjust(2) + " " + " ".join(
-                    [location.opponent_view() for location in row]))
-                row_num += 1
-            view.append("")
-        return view
-
-    def verify_empty(self, coords):
-        """Verify all coordinates are clear of ships"""
-        result = True
-        for coord in coords:
-            row, col = coord_to_offset(coord)
-            # assign location ship to this ship
-            if self.grid[row][col].ship:
-                result = False
-        return result
+        return self._view(False, as_list)
+
+    def verify_empty(self, cells):
+        """Verify all location indices are clear of ships"""
+        return not self.occupied & self._mask(cells)
+
+    def place_ship(self, ship):
+        """Place Ship on board"""
+        mask = self._mask(ship.cells)
+        for cell in ship.cells:
+            self.ship_at[cell] = len(self.ships)
+        self.ships.append(ship)
+        self.ship_masks.append(mask)
+        self.occupied |= mask
+        if not ship.sunk:
+            self.afloat += 1
+        self._touch(ship.cells)
+
+    def guess(self, cell):
+        """Apply guess at a location index to board
+
+        Returns:
+            ShotResult: outcome of the guess
+        """
+        bit = 1 << cell
+        if not self.occupied & bit:
+            self.misses |= bit
+            self._touch((cell,))
+            return ShotResult(cell, MISS, board_size=self.size)
+        ship_id = self.ship_at[cell]
+        ship, mask = self.ships[ship_id], self.ship_masks[ship_id]
+        if self.hits & bit:
+            # repeated guess: report current state without recounting
+            outcome = SUNK if ship.sunk else HIT
+            return ShotResult(cell, outcome, ship, ship_id, self.size)
+        self.hits |= bit
+        if ship.hit(cell) == HIT:
+            self._touch((cell,))
+            return ShotResult(cell, HIT, ship, ship_id, self.size)
+        self.sunk |= mask
+        self.afloat -= 1
+        self._touch(ship.cells)
+        return ShotResult(cell, SUNK, ship, ship_id, self.size)
+
+    def random_placement(self, length, rng=random):
+        """Return (direction, anchor) of a random placement clear of ships
+
+        Drawn uniformly among the free placements of a ship length.
+        Returns None when placed ships leave no room for the length.
+        """
+        index = placement_index(self.size, length)
+        free = free_placements(index, self.occupied)
+        if not free:
+            return None
+        pid = rng.choice(free)
+        return index.directions[pid].upper(), index.cells[pid][0]
+
+
+class SparseBoard(Board):
+    """Battleship Board keeping only ship and guessed locations
+
+    Same operations as Board, but state lives in dicts and sets of
+    location indices, so memory and the cost of a guess depend on the
+    ships and guesses rather than the board area. Meant for very large
+    boards (1000x1000) where Board's bitmasks span a million bits; only
+    the first render of a display view still costs O(size**2).
+
+    Attributes:
+        ships (List[Ship]): ships placed on the board, index is the ship id
+        ship_at (dict): location index -> id of the ship covering it
+        hits (set): locations guessed that held a ship
+        misses (set): locations guessed that were empty
+        sunk (set): locations of ships that have been sunk
+        afloat (int): number of ships not sunk yet
+    """
+
+    def __init__(self, size=BOARD_SIZE):
+        self.size = size
+        self.ships = []
+        self.ship_at = {}
+        self.hits = set()
+        self.misses = set()
+        self.sunk = set()
+        self.afloat = 0
+        self._lines = {True: [None] * size, False: [None] * size}
+
+    def _row_cells(self, row, reveal):
+        """Return the location symbols of one row"""
+        start = row * self.size
+        cells = [EMPTY] * self.size
+        for col in range(self.size):
+            cell = start + col
+            if cell in self.misses:
+                cells[col] = MISS
+            elif cell in self.sunk:
+                cells[col] = SUNK
+            elif cell in self.hits:
+                cells[col] = HIT
+            elif reveal and cell in self.ship_at:
+                cells[col] = self.ships[self.ship_at[cell]].char
+        return cells
+
+    def verify_empty(self, cells):
+        """Verify all location indices are clear of ships"""
+        return not any(cell in self.ship_at for cell in cells)
 
     def place_ship(self, ship):
         """Place Ship on board"""
-        for coord in ship.coords:
-            row, col = coord_to_offset(coord)
-            # assign location ship to this ship
-            self.grid[row][col].ship = ship
-
-    def guess(self, coord):
-        """Apply guess to board"""
-        row, col = coord_to_offset(coord)
-        result = self.grid[row][col].guess()
-        if result == MISS:
-            response = "Guess [{}]: You Missed!\n".format(coord)
-        elif result == HIT:
-            response = "Guess [{}]: You Hit!!\n".format(coord)
-        elif result == SUNK:
-            response = "Guess [{}]: You SUNK my {}\n".format(
-                coord, self.grid[row][col].ship.name)
-        return response
-
-
-class Location():
-    """A single board location tracking state and ships
+        for cell in ship.cells:
+            self.ship_at[cell] = len(self.ships)
+        self.ships.append(ship)
+        if not ship.sunk:
+            self.afloat += 1
+        self._touch(ship.cells)
+
+    def guess(self, cell):
+        """Apply guess at a location index to board
+
+        Returns:
+            ShotResult: outcome of the guess
+        """
+        ship_id = self.ship_at.get(cell)
+        if ship_id is None:
+            self.misses.add(cell)
+            self._touch((cell,))
+            return ShotResult(cell, MISS, board_size=self.size)
+        ship = self.ships[ship_id]
+        if cell in self.hits:
+            # repeated guess: report current state without recounting
+            outcome = SUNK if ship.sunk else HIT
+            return ShotResult(cell, outcome, ship, ship_id, self.size)
+        self.hits.add(cell)
+        if ship.hit(cell) == HIT:
+            self._touch((cell,))
+            return ShotResult(cell, HIT, ship, ship_id, self.size)
+        self.sunk.update(ship.cells)
+        self.afloat -= 1
+        self._touch(ship.cells)
+        return ShotResult(cell, SUNK, ship, ship_id, self.size)
+
+    def random_placement(self, length, rng=random):
+        """Return (direction, anchor) of a random placement clear of ships
+
+        The same distribution as Board.random_placement without building
+        the placement index, see placement.random_free_placement.
+        Returns None when placed ships leave no room for the length.
+        """
+        pid = random_free_placement(self.size, length, self.ship_at, rng)
+        if pid is None:
+            return None
+        direction, cells = placement_at(self.size, length, pid)
+        return direction.upper(), cells[0]
+
+
+class GuessHistory():
+    """Locations guessed by a player, in order
+
+    Membership is a bytearray lookup and the untried locations are kept
+    in a list with a position index, so adding a guess, checking a
+    location and sampling an untried location are all O(1).
 
     Args:
-        coord (str): coordiante name "A10"
+        size (int): board size
 
     Attributes:
-        ship (Ship): the Ship occupying this location
+        untried (List[int]): locations not guessed yet, in no fixed order
     """
 
-    def __init__(self, coord):
-        "docstring"
-        self.coord = coord
-        self.ship = None
-        self.state = EMPTY
+    def __init__(self, size=BOARD_SIZE):
+        self.size = size
+        self._order = []
+        self._flags = bytearray(size * size)
+        self.untried = list(range(size * size))
+        # position of each untried location in self.untried
+        self._pos = list(range(size * size))
+
+    def __len__(self):
+        return len(self._order)
 
-    def player_view(self):
-        """Return board location state as seen by player"""
-        if self.ship:
-            return self.ship.get_state_player(self.coord)
-        else:
-            return self.state
+    def __iter__(self):
+        return iter(self._order)
 
-    def opponent_view(self):
-        """Return board location state as seen by oppoment"""
-        if self.ship:
-            return self.ship.get_state_opponent(self.coord)
-        else:
-            return self.state
+    def __contains__(self, cell):
+        return 0 <= cell < len(self._flags) and self._flags[cell] == 1
 
-    def guess(self):
-        """process a guess at this location"""
-        if not self.ship:
-            # a miss
-            self.state = MISS
-        else:
-            self.state = self.ship.hit(self.coord)
-        return self.state
+    def __repr__(self):
+        return repr(self._order)
+
+    def append(self, cell):
+        """Record a guess at a location index"""
+        if self._flags[cell]:
+            return
+        self._flags[cell] = 1
+        self._order.append(cell)
+        # swap-remove from untried
+        pos = self._pos[cell]
+        last = self.untried.pop()
+        if last != cell:
+            self.untried[pos] = last
+            self._pos[last] = pos
+
+    def random_untried(self, rng=random):
+        """Return a random location not guessed yet, drawn from rng"""
+        return rng.choice(self.untried)
+
+
+class SparseGuessHistory(GuessHistory):
+    """GuessHistory keeping only the guessed locations
+
+    For sparse games: memory is proportional to the guesses and there is
+    no untried list. An untried location is drawn by redrawing random
+    locations, with a scan of the board once SPARSE_TRIES draws miss.
+
+    Args:
+        size (int): board size
+    """
+
+    def __init__(self, size=BOARD_SIZE):
+        self.size = size
+        self._order = []
+        self._guessed = set()
+
+    def __contains__(self, cell):
+        return cell in self._guessed
+
+    def append(self, cell):
+        """Record a guess at a location index"""
+        if cell in self._guessed:
+            return
+        self._guessed.add(cell)
+        self._order.append(cell)
+
+    def random_untried(self, rng=random):
+        """Return a random location not guessed yet, drawn from rng"""
+        area = self.size * self.size
+        for _ in range(SPARSE_TRIES):
+            cell = rng.randrange(area)
+            if cell not in self._guessed:
+                return cell
+        return rng.choice([cell for cell in range(area)
+                           if cell not in self._guessed])
 
 
 class Player():
@@ -136,49 +493,76 @@ class Player():
 
     Args:
         name (str): players name
+        rng (random.Random): this player's random stream. Default is a new
+            stream seeded from the random module
+        config (GameConfig): board size, fleet and board backend
 
     Attributes:
         board (Board): players game board
         ships (List[Ship]): list of player ships
-        guesses (List[str]): list of coordinates guessed
+        guesses (GuessHistory): location indices guessed, a
+            SparseGuessHistory in sparse games
+        instrument (Instrumentation): branch counters and timers
     """
 
-    def __init__(self, name):
+    def __init__(self, name, rng=None, config=DEFAULT_CONFIG):
         """Define player's name, board, ships, guesses"""
         self.name = name
+        if rng is None:
+            rng = random.Random(random.getrandbits(64))
+        self.rng = rng
+        self.config = config
         # create dict of player's ships
-        self.board = Board()
+        self.board = (SparseBoard if config.sparse else Board)(config.size)
         self.ships = []
-        self.guesses = []
+        self.guesses = (SparseGuessHistory if config.sparse
+                        else GuessHistory)(self.board.size)
+        # bool: print AI reasoning and guess errors (off for simulation)
+        self.verbose = True
+        self.instrument = Instrumentation()
+
+    @property
+    def call_count(self):
+        """Counter of heuristic branches taken"""
+        return self.instrument.counters
 
     def add_ship(self, ship):
         """add ship to current list of ships"""
         self.ships.append(ship)
 
+    def clear_fleet(self):
+        """Remove all ships, e.g. to draw again a fleet that did not fit"""
+        self.board = type(self.board)(self.board.size)
+        self.ships = []
+
     def ships_left(self):
-        """Search for unsunken ships"""
-        found = False
-        for ship in self.ships:
-            if not ship.sunk:
-                found = True
-        return found
-
-    def deal_shoot_response(self, coord, response, opponent_board_view):
+        """Check for unsunken ships, O(1) via the board's afloat count"""
+        return self.board.afloat > 0
+
+    def log(self, *args):
+        """print debug output when player is verbose"""
+        if self.verbose:
+            print(*args)
+
+    def deal_shoot_response(self, event):
         raise Exception("Need to implement this function in base class!")
 
     def direction_anchor(self, ship_spec):
-        hv = random.choice('HV')
-        r = random.choice(list(range(1,11)))
-        c = random.choice([chr(x+64) for x in range(1,11)])
-        return hv, "{}{}".format(c,r)
+        """Pick a random placement for ship_spec clear of placed ships
+
+        Returns:
+            tuple: (direction, anchor), None when placed ships leave no
+                room and the fleet has to be placed again
+        """
+        return self.board.random_placement(ship_spec[1], self.rng)
     
     
 class HumanPlayer(Player):
     """Human Player"""
-    def __init__(self):
+    def __init__(self, config=DEFAULT_CONFIG):
         # ask for players names
         name = ask_player_name("Human Player")
-        Player.__init__(self, name)
+        Player.__init__(self, name, config=config)
         self.defense_mode = None
 
     def direction_anchor(self, ship_spec):
@@ -191,101 +575,117 @@ class HumanPlayer(Player):
         elif self.defense_mode == 2:
             cache_dict = get_cache('last_coord.p')
             direction = get_vert_or_horiz()
-            anchor = get_anchor_coord()
+            anchor = get_anchor_coord(self.board.size)
             cache_dict[ship_name] = [direction, anchor]
             pickle.dump(cache_dict, open('last_coord.p', 'wb'))
-            return direction, anchor
+            return direction, coord_to_cell(anchor, self.board.size)
         elif self.defense_mode == 3:
             cache_dict = get_cache('last_coord.p')
-            return cache_dict[ship_name]
+            direction, anchor = cache_dict[ship_name]
+            return direction, coord_to_cell(anchor, self.board.size)
 
     def guess(self):
         return get_guess(self)
 
-    def deal_shoot_response(self, coord, response, opponent_board_view):
+    def deal_shoot_response(self, event):
         return
 
 class AIPlayer(Player):
     """AIPlayer 1.0"""
-    def __init__(self, name="1"):
-        Player.__init__(self, "AI-{}".format(name))
-        self.potential = []
-        self.opponent_board = [[EMPTY]*BOARD_SIZE]*BOARD_SIZE
+    def __init__(self, name="1", rng=None, config=DEFAULT_CONFIG):
+        Player.__init__(self, "AI-{}".format(name), rng, config)
+        size = config.size
+        self.potential = TargetQueue(size)
+        # dict: opponent location -> known symbol, for non-EMPTY locations
+        self.opponent_cells = {}
+        # int: bitmask of opponent locations that are no longer EMPTY
+        self.known = 0
         self.last_hit = None
-        self.call_count = Counter()
 
     def guess(self):
         while True:
             if self.potential:
-                guess = self.potential.pop(0)
+                self.instrument.count("target")
+                guess = self.potential.pop()
             else:
-                guess = offset_to_coord(*self.shoot_random())
-            if validate_guess(guess, self):
+                guess = self.shoot_random()
+            if validate_guess(guess, self, quiet=not self.verbose):
                 break
-        self.opponent_empty.remove(coord_to_offset(guess))
+            self.instrument.count("retry")
         return guess
 
+    @property
+    def opponent_board(self):
+        """List[List[str]]: what this player knows of the opponent board"""
+        size = self.board.size
+        board = [[EMPTY]*size for _ in range(size)]
+        for cell, symbol in self.opponent_cells.items():
+            x,y = divmod(cell, size)
+            board[x][y] = symbol
+        return board
+
+    def record_shot(self, event):
+        """Update knowledge of the opponent board from a ShotEvent"""
+        for cell in (event.cell,) + event.ship_cells:
+            self.opponent_cells[cell] = event.outcome
+        self.known |= 1 << event.cell
+
+    def push_neighbours(self, x, y, hit_order):
+        """Queue unguessed on-board neighbours of (x, y) at the front"""
+        for dx,dy in hit_order:
+            new_cell = offset_to_cell(x+dx, y+dy, self.board.size)
+            if new_cell is not None and new_cell not in self.guesses and new_cell not in self.potential:
+                self.potential.push_front(new_cell)
+
     def shoot_random_basic(self):
-        empty_list = find_symbol_in_board(self.opponent_board, EMPTY)
-#        while True:
-#            r = random.choice(list(range(BOARD_SIZE)))
-#            c = random.choice(list(range(BOARD_SIZE)))
-#            if not self.opponent_board or self.opponent_board[r][c]==EMPTY:
-#                return offset_to_coord(r,c)
-        return random.choice(empty_list)
+        # untried guesses are exactly the EMPTY locations
+        self.instrument.count("basic")
+        return self.guesses.random_untried(self.rng)
 
     def shoot_random(self):
-        for i in range(50):
-            ind = random.choice(list(range(BOARD_SIZE**2//2)))
-            c = 2*(ind%5)
-            r = ind//5
-            if r%2:
-                c += 1
-            if not self.opponent_board or self.opponent_board[r][c]==EMPTY:
-                self.call_count["diagonal"] += 1
-                return (r,c)
+        size = self.board.size
+        # locations with row + col even; on odd sizes exactly the even cells
+        half, odd = divmod(size, 2)
+        for i in range(PARITY_TRIES):
+            if odd:
+                r, c = divmod(2 * self.rng.randrange((size*size + 1)//2), size)
+            else:
+                r, ind = divmod(self.rng.randrange(size*half), half)
+                c = 2*ind + r%2
+            if self.opponent_cells.get(r*size + c, EMPTY)==EMPTY:
+                self.instrument.count("diagonal")
+                return r*size + c
         return self.shoot_random_basic()
 
-    def deal_shoot_response(self, coord, response, opponent_board_view):
-        x,y = coord_to_offset(coord)
+    def deal_shoot_response(self, event):
+        self.record_shot(event)
+        size = self.board.size
+        x,y = divmod(event.cell, size)
         hit_order = [(0,-1), (-1,0), (0,1), (1,0)]
 
-        if "Hit" in response:
+        if event.outcome == HIT:
             direction = None
             if self.last_hit:
                 direction = (x-self.last_hit[0], y-self.last_hit[1])
                 if direction in hit_order:
                     hit_order.remove(direction)
                     hit_order.append(direction)
-                    print(direction, 'move ahead')
+                    self.log(direction, 'move ahead')
 
-            for dx,dy in hit_order:
-                new_coord = offset_to_coord(x+dx,y+dy)
-                if new_coord not in self.guesses and new_coord not in self.potential and is_legal_coord(new_coord):
-                    self.potential.insert(0, new_coord)
+            self.push_neighbours(x, y, hit_order)
 
             if direction:
-                axis = None
-                if not direction[0]:
-                    axis = str(x + 1)
-                elif not direction[1]:
-                    axis = chr(ord('A') + y)
-                if axis:
-                    for coord in self.potential:
-                        if axis in coord:
-                            self.potential.remove(coord)
-                            self.potential.insert(0, coord)
-                            print(coord, 'move ahead')
+                for cell in self.potential.promote(x, y, direction):
+                    self.log(cell_to_coord(cell, size), 'move ahead')
 
             self.last_hit = (x,y)
 
-        elif "SUNK" in response:
-            diff = compare_two_boards(opponent_board_view, self.opponent_board)
-            for x,y in diff:
+        elif event.outcome == SUNK:
+            for cell in event.ship_cells:
+                x,y = divmod(cell, size)
                 for dx,dy in hit_order:
-                    around = offset_to_coord(x+dx,y+dy)
-                    if around in self.potential:
-                        self.potential.remove(around)
+                    around = offset_to_cell(x+dx, y+dy, size)
+                    self.potential.remove(around)
                 
             if not self.potential:
                 self.last_hit = None
@@ -293,88 +693,75 @@ class AIPlayer(Player):
 #            ship_name = response.split()[-1]
 #            ship_size = list(filter(lambda x:x[0]==ship_name, SHIP_INFO))[0][1]
 
-        self.opponent_board = opponent_board_view
-        print(self.potential)
+        self.log(self.potential)
 
 class AIPlayer_2_0(AIPlayer):
     """AIPlayer 2.0"""
-    def __init__(self, name):
-        AIPlayer.__init__(self, name)
+    def __init__(self, name, rng=None, config=DEFAULT_CONFIG):
+        AIPlayer.__init__(self, name, rng, config)
         self.hit_record = []
-        self.opponent_ships = [l for _,l in SHIP_INFO]
-        self.opponent_empty = [(x,y) for x in range(BOARD_SIZE) for y in range(BOARD_SIZE)]
-
-    def deal_shoot_response(self, coord, response, opponent_board_view):
-        hit_order = FOUR_DIRECTION
-
-        if "Hit" in response:
-            x,y = coord_to_offset(coord)
-            self.hit_record.append((x,y))
-
-        if "SUNK" in response:
-            self.potential = []
-            diff = compare_two_boards(opponent_board_view, self.opponent_board, SUNK)
-            for offset in diff:
-                if offset in self.hit_record:
-                    self.hit_record.remove(offset)
+        self.opponent_ships = list(config.ship_lengths)
+
+    def deal_shoot_response(self, event):
+        self.record_shot(event)
+        # copy so reordering never leaks into the next game
+        hit_order = list(FOUR_DIRECTION)
+        size = self.board.size
+
+        if event.outcome == HIT:
+            x,y = divmod(event.cell, size)
+            self.hit_record.append(event.cell)
+
+        if event.outcome == SUNK:
+            self.potential.clear()
+            for sunk in event.ship_cells:
+                if sunk in self.hit_record:
+                    self.hit_record.remove(sunk)
             
-            ship_size = len(diff)
+            ship_size = len(event.ship_cells)
             self.opponent_ships.pop(self.opponent_ships.index(ship_size))
             
             if self.hit_record:
-                x,y = self.hit_record[-1]
+                x,y = divmod(self.hit_record[-1], size)
             else:
                 return
             
-        if "Hit" in response or "SUNK" in response:
+        if event.outcome in (HIT, SUNK):
             direction = None
             if len(self.hit_record)>=2:
-                last2 = self.hit_record[-2]
+                last2 = divmod(self.hit_record[-2], size)
                 direction = (x-last2[0], y-last2[1])
                 if direction in hit_order:
                     hit_order.remove(direction)
                     hit_order.append(direction)
-                    print(direction, 'moved')
+                    self.log(direction, 'moved')
 
-            for dx,dy in hit_order:
-                new_coord = offset_to_coord(x+dx,y+dy)
-                if new_coord not in self.guesses and new_coord not in self.potential and is_legal_coord(new_coord):
-                    self.potential.insert(0, new_coord)
+            self.push_neighbours(x, y, hit_order)
 
             if direction:
-                axis = None
-                if not direction[0]:
-                    axis = str(x + 1)
-                elif not direction[1]:
-                    axis = chr(ord('A') + y)
-                if axis:
-                    for coord in self.potential:
-                        if axis in coord:
-                            self.potential.remove(coord)
-                            self.potential.insert(0, coord)
-                            print(coord, 'moved')
-
-
-        self.opponent_board = opponent_board_view
-        print(self.potential)
+                for cell in self.potential.promote(x, y, direction):
+                    self.log(cell_to_coord(cell, size), 'moved')
+
+        self.log(self.potential)
 
     def shoot_random(self):
         min_ship_len = min(self.opponent_ships)
         if min_ship_len>2:
-            print("Begin search min ship len")
-            for _ in range(50):
-                tag = True
-                x,y = AIPlayer.shoot_random_basic(self)
-                for dx,dy in FOUR_DIRECTION:
-                    for i in range(1,min_ship_len+1):
-                        r,c = x+i*dx, y+i*dy
-                        if is_legal_coord(offset_to_coord(r,c)) and self.opponent_board[r][c]!=EMPTY:
-                            tag = False
-                            break
-                            break
-                if tag:
-                    print(x,y)
-                    return (x,y)
+            self.log("Begin search min ship len")
+            # untried locations with no guessed location within
+            # min_ship_len in any direction
+            size = self.board.size
+            known = self.known
+            clear = ~(known | dilate(known, size, min_ship_len))
+            clear &= (1 << size**2) - 1
+            # as likely as one of PARITY_TRIES random untried picks being clear
+            untried = size**2 - len(self.guesses)
+            miss_all = 1 - popcount(clear) / untried
+            if clear and self.rng.random() >= miss_all**PARITY_TRIES:
+                cell = random_bit(clear, self.rng)
+                self.log(*divmod(cell, size))
+                self.instrument.count("min_len")
+                return cell
         
         return AIPlayer.shoot_random(self)
 
@@ -383,88 +770,100 @@ class AIPlayer_2_1(AIPlayer_2_0):
         min_ship_len = max(self.opponent_ships)
         if min_ship_len>2:
             min_ship_len = 3
-            print("Begin search min ship len")
-            legal = []
-            for x,y in self.opponent_empty:
-                tag = True
-                # x,y = AIPlayer.shoot_random_basic(self)
-                for dx,dy in FOUR_DIRECTION:
-                    for i in range(1,min_ship_len+1):
-                        r,c = x+i*dx, y+i*dy
-                        if is_legal_coord(offset_to_coord(r,c)) and self.opponent_board[r][c]!=EMPTY:
-                            tag = False
-                            break
-                            # break
-                if tag:
-                    legal.append((x,y))
+            self.log("Begin search min ship len")
+            size = self.board.size
+            known = self.known
+            legal = ~(known | dilate(known, size, min_ship_len))
+            legal &= (1 << size**2) - 1
             
             if legal:
-                x,y = random.choice(legal)            
-                # print(legal)
-                self.call_count['triagonal'] += 1
-                return (x,y)
+                cell = random_bit(legal, self.rng)
+                self.instrument.count("triagonal")
+                return cell
         
         return AIPlayer.shoot_random(self)
 
 class Ship():
-    """Ship with name, size, coordinates, and hits
+    """Ship with name, size, location indices, and hits
+
+    Hits are kept as a bitmask over the ship's own locations (bit i is
+    cells[i]) with a count of locations still afloat, so registering a
+    hit and checking sunk are O(1).
 
     Args:
         name (str): Name of the ship
         size (int): ship size (in board squares)
-        coords (list[str]): list of ship board coords
+        cells (tuple[int]): location indices covered by the ship
         direction (str): ship direction vertical or horizontal
 
     Attributes:
-        hits (int): coords "hit" by guess
-        sunk (bool): all coords "hit"
+        hit_mask (int): bit i set when cells[i] has been "hit"
+        remaining (int): locations not "hit" yet
+        sunk (bool): all locations "hit"
         char (str): display character "|" vertical "-" horizontal
     """
 
-    def __init__(self, name, size, coords, direction):
-        """Initialize Ship with name, size and coordinates
+    def __init__(self, name, size, cells, direction):
+        """Initialize Ship with name, size and location indices
         """
         self.name = name
         self.size = size
-        self.coords = coords
+        self.cells = tuple(cells)
         self.direction = direction
-        # List[str]: coordinates of ship that has been "hit"
-        self.hits = []
-        # Boolean: Has this ship sunk (all coords "hit")
-        self.sunk = False
+        # dict: location index -> bit position in hit_mask
+        self._bit = {cell: i for i, cell in enumerate(self.cells)}
+        self.hit_mask = 0
+        self.remaining = len(self.cells)
         # str: display character
         if direction.lower() == 'v':
             self.char = VERTICAL_SHIP
         else:
             self.char = HORIZONTAL_SHIP
 
-    def get_state_player(self, coord):
+    @property
+    def sunk(self):
+        """Has this ship sunk (all locations "hit")"""
+        return not self.remaining
+
+    @property
+    def hits(self):
+        """List[int]: locations of ship that have been hit"""
+        return [cell for cell, i in self._bit.items()
+                if self.hit_mask >> i & 1]
+
+    def is_hit(self, cell):
+        """Check if location index of this ship has been hit"""
+        return bool(self.hit_mask >> self._bit[cell] & 1)
+
+    def get_state_player(self, cell):
         """Display SUNK, HIT, or ship charactera"""
         if self.sunk:
             return SUNK
-        elif coord in self.hits:
+        elif self.is_hit(cell):
             return HIT
         else:
             return self.char
 
-    def get_state_opponent(self, coord):
+    def get_state_opponent(self, cell):
         """Display SUNK, HIT, or EMPTY (do not give away position)"""
         if self.sunk:
             return SUNK
-        elif coord in self.hits:
+        elif self.is_hit(cell):
             return HIT
         else:
             return EMPTY
 
-    def hit(self, coord):
-        """Apply a hit at this coord"""
-        if coord.upper() in self.coords:
-            # capture Hit!
-            self.hits.append(coord)
-            # check if sunk
-            if len(self.hits) == self.size:
-                self.sunk = True
-                self.char = SUNK
-                return SUNK
-            else:
-                return HIT
+    def hit(self, cell):
+        """Apply a hit at this location index"""
+        i = self._bit.get(cell)
+        if i is None:
+            return None
+        # capture Hit! (a repeated hit does not count twice)
+        if not self.hit_mask >> i & 1:
+            self.hit_mask |= 1 << i
+            self.remaining -= 1
+        # check if sunk
+        if not self.remaining:
+            self.char = SUNK
+            return SUNK
+        return HIT
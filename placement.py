@@ -0,0 +1,250 @@
+#!/usr/bin/python3
+"""Precomputed ship placement index for the Battleship project.
+
+Board location (row, col) is index ``row * size + col`` and bit
+``1 << index`` in a bitmask, matching models.Board.
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from functools import lru_cache
+import random
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+
+class PlacementIndex():
+    """Every legal placement of one ship length on one board size
+
+    Placements are numbered horizontal first, then vertical, each in
+    row-major order of their anchor (upper-most or left-most location).
+
+    Args:
+        size (int): board size
+        length (int): ship length
+
+    Attributes:
+        cells (List[tuple]): location indices of each placement, anchor first
+        masks (List[int]): bitmask of each placement
+        directions (List[str]): 'h' or 'v' for each placement
+        by_anchor (dict): (anchor index, direction) -> placement id
+        cover (List[tuple]): per location, ids of placements covering it
+    """
+
+    def __init__(self, size, length):
+        self.size = size
+        self.length = length
+        self.cells = []
+        self.masks = []
+        self.directions = []
+        self.by_anchor = {}
+        cover = [[] for _ in range(size * size)]
+        for direction, step in (('h', 1), ('v', size)):
+            for row in range(size):
+                for col in range(size):
+                    if (col if direction == 'h' else row) + length > size:
+                        continue
+                    anchor = row * size + col
+                    cells = tuple(anchor + k * step for k in range(length))
+                    pid = len(self.cells)
+                    self.cells.append(cells)
+                    self.masks.append(sum(1 << cell for cell in cells))
+                    self.directions.append(direction)
+                    self.by_anchor[(anchor, direction)] = pid
+                    for cell in cells:
+                        cover[cell].append(pid)
+        self.cover = [tuple(pids) for pids in cover]
+
+    def __len__(self):
+        return len(self.cells)
+
+    def find(self, row, col, direction):
+        """Return placement id anchored at (row, col), or None if off board
+
+        Args:
+            row (int): anchor row offset
+            col (int): anchor column offset
+            direction (str): 'h'/'H' horizontal or 'v'/'V' vertical
+        """
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            return None
+        return self.by_anchor.get((row * self.size + col,
+                                   direction[0].lower()))
+
+
+@lru_cache(maxsize=None)
+def placement_index(size, length):
+    """Return the shared PlacementIndex for a board size and ship length"""
+    return PlacementIndex(size, length)
+
+
+@lru_cache(maxsize=None)
+def board_masks(size):
+    """Return (all locations, all but the first column, all but the last)"""
+    full = (1 << size * size) - 1
+    first_col = sum(1 << row * size for row in range(size))
+    last_col = first_col << size - 1
+    return full, full ^ first_col, full ^ last_col
+
+
+def dilate(mask, size, reach):
+    """Return the locations 1 to reach steps from a set location
+
+    Steps run in the four directions and stop at the board edge; a set
+    location is only included when it is itself within reach of another.
+    Works on whole rows of bits at a time by shifting the mask, so the
+    cost is a few big-integer operations per step whatever the board size.
+
+    Args:
+        mask (int): bitmask of locations
+        size (int): board size
+        reach (int): maximum steps
+
+    Returns:
+        int: bitmask of locations within reach of mask
+    """
+    full, not_first, not_last = board_masks(size)
+    out = 0
+    left = right = mask
+    for step in range(1, reach + 1):
+        # a column shift that wraps onto the next row is masked off
+        left = (left >> 1) & not_last
+        right = (right << 1) & not_first
+        out |= left | right | (mask >> step * size) | (mask << step * size)
+    return out & full
+
+
+def free_placements(index, occupied):
+    """Return ids of placements in index not overlapping occupied
+
+    Args:
+        index (PlacementIndex): placements of one ship length
+        occupied (int): bitmask of locations already taken
+    """
+    if not occupied:
+        return range(len(index))
+    return [pid for pid, mask in enumerate(index.masks) if not mask & occupied]
+
+
+def random_fleet(size, ship_lengths, rng=random, occupied=0):
+    """Sample one random fleet without rejecting colliding ships
+
+    Each ship is drawn uniformly among the placements that do not overlap
+    the ships placed before it, the same distribution as retrying random
+    placements until one fits. In the rare case a ship has no free
+    placement left, the whole fleet is drawn again.
+
+    Args:
+        size (int): board size
+        ship_lengths (List[int]): length of each ship, in placement order
+        rng (random.Random): random source, default the random module
+        occupied (int): bitmask of locations that must stay empty
+
+    Returns:
+        List[int]: placement id of each ship in its length's PlacementIndex
+    """
+    indexes = [placement_index(size, length) for length in ship_lengths]
+    while True:
+        taken = occupied
+        fleet = []
+        for index in indexes:
+            free = free_placements(index, taken)
+            if not free:
+                break
+            pid = rng.choice(free)
+            fleet.append(pid)
+            taken |= index.masks[pid]
+        else:
+            return fleet
+
+
+# largest board size placement indexes are built for; larger (sparse)
+# boards compute placements on demand with placement_at
+INDEX_MAX_SIZE = 128
+# uniform draws tried before random_free_placement scans every placement
+SPARSE_TRIES = 1000
+
+
+def placement_count(size, length):
+    """Return the number of placements of a ship length, see PlacementIndex"""
+    return 2 * size * (size - length + 1)
+
+
+def placement_at(size, length, pid):
+    """Return (direction, cells) of a placement id without an index
+
+    Follows the PlacementIndex numbering, so it agrees with
+    placement_index(size, length) wherever that can be built.
+    """
+    span = size - length + 1
+    if pid < size * span:
+        row, col = divmod(pid, span)
+        direction, step = 'h', 1
+    else:
+        row, col = divmod(pid - size * span, size)
+        direction, step = 'v', size
+    anchor = row * size + col
+    return direction, tuple(range(anchor, anchor + length * step, step))
+
+
+def random_free_placement(size, length, taken, rng=random):
+    """Return a uniform random placement id clear of taken, or None
+
+    Redraws uniform placement ids until one is clear, without building
+    the placement index. After SPARSE_TRIES misses every placement is
+    scanned, so a crowded board costs one full pass instead of spinning.
+
+    Args:
+        size (int): board size
+        length (int): ship length
+        taken (container): location indices already taken
+        rng (random.Random): random source, default the random module
+
+    Returns:
+        int: placement id, see placement_at; None if none is clear
+    """
+    def clear(pid):
+        return not any(cell in taken
+                       for cell in placement_at(size, length, pid)[1])
+
+    count = placement_count(size, length)
+    for _ in range(SPARSE_TRIES):
+        pid = rng.randrange(count)
+        if clear(pid):
+            return pid
+    free = [pid for pid in range(count) if clear(pid)]
+    return rng.choice(free) if free else None
+
+
+def sparse_fleet(size, ship_lengths, rng=random):
+    """Sample one random fleet on a board too large to index
+
+    Draws each ship with random_free_placement, the same distribution as
+    random_fleet at a cost set by the fleet rather than the board area.
+    In the rare case a ship has no free placement left, the whole fleet
+    is drawn again.
+
+    Returns:
+        List[int]: placement id of each ship, see placement_at
+    """
+    while True:
+        taken = set()
+        fleet = []
+        for length in ship_lengths:
+            pid = random_free_placement(size, length, taken, rng)
+            if pid is None:
+                break
+            taken.update(placement_at(size, length, pid)[1])
+            fleet.append(pid)
+        else:
+            return fleet
+
+
+def random_fleets(count, size, ship_lengths, rng=random):
+    """Sample count independent fleets, see random_fleet
+
+    Returns:
+        List[List[int]]: placement ids of each fleet
+    """
+    return [random_fleet(size, ship_lengths, rng) for _ in range(count)]
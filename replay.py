@@ -0,0 +1,275 @@
+#!/usr/bin/python3
+"""Deterministic replay of recorded Battleship games.
+
+A game is reconstructed from a gamelog.GameRecord, or from its seed
+(and fleets, when they came from a corpus) by playing it again with
+engine.play_seeded. Replay steps through the shots forward and backward;
+verify_outcomes and verify_ai check whole logs against the current
+Board/Ship rules and AI code.
+
+Step through game 3 of a log, or check every game:
+
+    python replay.py games.log --game 3
+    python replay.py games.log --verify [--ai]
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+from functools import partial
+import argparse
+import sys
+
+from config import DEFAULT_CONFIG, GameConfig
+from engine import place_fleet, play_seeded
+from gamelog import GameRecord, fleet_layout, read_games, read_header
+from models import AIPlayer_2_0, AIPlayer_2_1, Player
+from utils import cell_to_coord
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+
+def tournament_players(rng1=None, rng2=None, config=DEFAULT_CONFIG):
+    """Return the players of a mode 4 test game, see engine.play_seeded"""
+    return AIPlayer_2_1(1, rng1, config), AIPlayer_2_0(2, rng2, config)
+
+
+def play_recorded(seed, make_players=tournament_players, ship_info=None,
+                  layouts=(None, None)):
+    """Play a game with engine.play_seeded and record it
+
+    Args:
+        seed (int): seed the game is played from
+        make_players (callable): make_players(rng1, rng2) returns
+            (player1, player2)
+        ship_info (List[tuple]): (ship_name, ship_size) of each ship,
+            default from the players' config
+        layouts (tuple): fleets of player 1 and 2, None to draw from seed
+
+    Returns:
+        tuple: (GameResult, GameRecord)
+    """
+    players = []
+
+    def make(rng1, rng2):
+        players.extend(make_players(rng1, rng2))
+        return players
+
+    result = play_seeded(make, seed, ship_info, layouts)
+    return result, GameRecord(
+        seed, tuple(fleet_layout(player) for player in players),
+        [(cell, outcome) for _, cell, outcome in result.shots])
+
+
+def record_from_seed(seed, make_players=tournament_players, ship_info=None,
+                     layouts=(None, None)):
+    """Play a game again from its seed and return its GameRecord"""
+    return play_recorded(seed, make_players, ship_info, layouts)[1]
+
+
+class Replay():
+    """Step through a recorded game on real boards
+
+    Args:
+        record (GameRecord): game to replay
+        config (GameConfig): board size and fleet of the game
+
+    Attributes:
+        players (List[Player]): player 1 and player 2 with their fleets
+        position (int): number of shots applied so far
+    """
+
+    def __init__(self, record, config=DEFAULT_CONFIG):
+        self.record = record
+        self.config = config
+        self._reset()
+
+    def __len__(self):
+        return len(self.record.shots)
+
+    def _reset(self):
+        self.players = [Player("Player 1", config=self.config),
+                        Player("Player 2", config=self.config)]
+        for player, layout in zip(self.players, self.record.layouts):
+            place_fleet(player, layout=layout)
+        self.position = 0
+
+    @property
+    def shooter(self):
+        """Index of the player taking the next shot"""
+        return self.position % 2
+
+    def forward(self):
+        """Apply the next shot
+
+        Returns:
+            ShotResult: outcome under the current Board rules
+
+        Raises:
+            ValueError: the outcome differs from the recorded one
+        """
+        if self.position >= len(self):
+            raise IndexError("no more shots in this game")
+        cell, outcome = self.record.shots[self.position]
+        result = self.players[1 - self.shooter].board.guess(cell)
+        if result.outcome != outcome:
+            raise ValueError("shot {} at {}: recorded {!r}, replayed {!r}"
+                             "".format(self.position, cell, outcome,
+                                       result.outcome))
+        self.position += 1
+        return result
+
+    def backward(self):
+        """Undo the last shot"""
+        if not self.position:
+            raise IndexError("already at the first shot")
+        self.seek(self.position - 1)
+
+    def seek(self, position):
+        """Go to the state after position shots
+
+        Boards cannot un-guess, so going back replays from the start.
+        """
+        if not 0 <= position <= len(self):
+            raise IndexError("shot position out of range")
+        if position < self.position:
+            self._reset()
+        while self.position < position:
+            self.forward()
+
+
+def verify_outcomes(record, config=DEFAULT_CONFIG):
+    """Check a record's outcomes under the current Board/Ship rules
+
+    Returns:
+        int: position of the first mismatching shot, None if all match
+            and the last shot sinks the fleet
+    """
+    replay = Replay(record, config)
+    for position in range(len(replay)):
+        try:
+            replay.forward()
+        except ValueError:
+            return position
+    if replay.players[1 - (len(replay) - 1) % 2].ships_left():
+        return len(replay)
+    return None
+
+
+def verify_ai(record, make_players=tournament_players):
+    """Check the current AI code still plays a record's shots
+
+    Args:
+        record (GameRecord): recorded game
+        make_players (callable): make_players(rng1, rng2) returns the
+            players of the game, with their config
+
+    Returns:
+        int: position of the first differing shot, None if identical
+    """
+    replayed = record_from_seed(record.seed, make_players,
+                                layouts=record.layouts).shots
+    for position, (old, new) in enumerate(zip(record.shots, replayed)):
+        if old != new:
+            return position
+    if len(record.shots) != len(replayed):
+        return min(len(record.shots), len(replayed))
+    return None
+
+
+def log_config(path):
+    """Return the GameConfig of the games in a log, from its header
+
+    The header keeps ship lengths only; a fleet matching the default
+    one keeps its ship names, others are numbered.
+    """
+    size, ship_lengths = read_header(path)
+    if ship_lengths == DEFAULT_CONFIG.ship_lengths:
+        return GameConfig(size, DEFAULT_CONFIG.ship_info)
+    return GameConfig(size, [("Ship {}".format(number), length)
+                             for number, length in enumerate(ship_lengths, 1)])
+
+
+def verify_log(path, ai=False, make_players=None):
+    """Verify every game of a log
+
+    Args:
+        path (str): game log
+        ai (bool): also replay the AI decisions, not only the outcomes
+        make_players (callable): returns (player1, player2), for ai;
+            default the mode 4 players with the log's config
+
+    Yields:
+        tuple: (game number, shot position) of every game that fails
+    """
+    config = log_config(path)
+    if make_players is None:
+        make_players = partial(tournament_players, config=config)
+    for number, record in enumerate(read_games(path)):
+        position = verify_outcomes(record, config)
+        if position is None and ai:
+            position = verify_ai(record, make_players)
+        if position is not None:
+            yield number, position
+
+
+def show(replay):
+    """Print both boards and the last shot"""
+    from battleship_ai import print_all_boards
+    player1, player2 = replay.players
+    print("Shot {}/{}".format(replay.position, len(replay)))
+    if replay.position:
+        cell, outcome = replay.record.shots[replay.position - 1]
+        print("{} guessed {}: {}".format(
+            replay.players[replay.shooter ^ 1].name,
+            cell_to_coord(cell, replay.config.size), outcome))
+    print_all_boards(player1.name, player2.name,
+                     player1.board.get_player_view(),
+                     player2.board.get_player_view())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log', help="game log from gamelog.GameLog")
+    parser.add_argument('--game', type=int, default=0,
+                        help="game number to step through")
+    parser.add_argument('--verify', action='store_true',
+                        help="check every game instead of stepping")
+    parser.add_argument('--ai', action='store_true',
+                        help="with --verify, also replay the AI decisions")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        failures = 0
+        for number, position in verify_log(args.log, args.ai):
+            failures += 1
+            print("game {} differs at shot {}".format(number, position))
+        print("{} game(s) differ".format(failures))
+        return 1 if failures else 0
+
+    for number, record in enumerate(read_games(args.log)):
+        if number == args.game:
+            break
+    else:
+        print("no game {} in {}".format(args.game, args.log))
+        return 1
+    print("Seed: {}".format(record.seed))
+    replay = Replay(record, log_config(args.log))
+    show(replay)
+    while True:
+        command = input("[n]ext, [p]revious, [g]oto N, [q]uit: ").split()
+        if not command or command[0] == 'n':
+            if replay.position < len(replay):
+                replay.forward()
+        elif command[0] == 'p':
+            if replay.position:
+                replay.backward()
+        elif command[0] == 'g' and len(command) > 1:
+            replay.seek(max(0, min(len(replay), int(command[1]))))
+        elif command[0] == 'q':
+            return 0
+        show(replay)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
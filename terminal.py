@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""Incremental ANSI terminal renderer for the Battleship project.
+
+A frame is a list of text lines. TerminalRenderer remembers the frame it
+drew last and turns the next one into cursor moves plus the characters
+that changed, written in one buffered write, so animating a game costs
+a few bytes per shot instead of a full screen repaint.
+
+Project 2 - Treehouse Techdegree - Python Web Development
+"""
+import sys
+
+__author__ = "Chris Freeman"
+__copyright__ = "Copyright 2016, Chris Freeman"
+__license__ = "MIT"
+
+# cursor home and erase screen
+CLEAR = "\033[H\033[2J"
+# erase from cursor to end of line
+ERASE_LINE = "\033[K"
+# erase from cursor to end of screen
+ERASE_BELOW = "\033[J"
+# unchanged characters worth rewriting rather than moving the cursor over
+GAP = 4
+
+
+def move(row, col):
+    """Return the escape sequence moving the cursor to a 0-based position"""
+    return "\033[{};{}H".format(row + 1, col + 1)
+
+
+def line_changes(row, old, new):
+    """Return the writes turning line old into line new on screen
+
+    Runs of changed characters closer than GAP are merged, since a cursor
+    move costs more bytes than rewriting a few unchanged characters.
+
+    Args:
+        row (int): screen row of the line, 0-based
+        old (str): line currently on screen
+        new (str): line to show
+
+    Returns:
+        List[str]: cursor moves followed by text
+    """
+    writes = []
+    start = None
+    same = 0
+    for col, char in enumerate(new):
+        if col < len(old) and old[col] == char:
+            if start is not None:
+                same += 1
+                if same > GAP:
+                    writes.append(move(row, start) + new[start:col - same + 1])
+                    start = None
+        else:
+            if start is None:
+                start = col
+            same = 0
+    if start is not None:
+        writes.append(move(row, start) + new[start:len(new) - same])
+    if len(new) < len(old):
+        writes.append(move(row, len(new)) + ERASE_LINE)
+    return writes
+
+
+class TerminalRenderer():
+    """Draw frames on an ANSI terminal, sending only what changed
+
+    The first frame (and the first after reset) clears the screen. Each
+    frame ends with the cursor on the line below it, so ordinary prints
+    and prompts that follow appear under the frame. Whatever they left
+    there is erased by the next frame, and lines a frame adds below the
+    last one are written whole.
+
+    Args:
+        stream (file): text stream to draw on, default sys.stdout
+
+    Attributes:
+        frames (int): frames drawn
+        bytes_written (int): characters written for all frames
+    """
+
+    def __init__(self, stream=None):
+        self.stream = sys.stdout if stream is None else stream
+        self.frames = 0
+        self.bytes_written = 0
+        self._frame = None
+
+    def reset(self):
+        """Forget the drawn frame so the next draw repaints the screen"""
+        self._frame = None
+
+    def draw(self, lines):
+        """Show a frame
+
+        Args:
+            lines (List[str]): frame text, one string per screen line
+        """
+        writes = []
+        old = self._frame
+        if old is None:
+            writes.append(CLEAR)
+            old = []
+        for row, line in enumerate(lines):
+            if row >= len(old):
+                # may hold prompts printed below the last frame
+                writes.append(move(row, 0) + line + ERASE_LINE)
+            elif line != old[row]:
+                writes.extend(line_changes(row, old[row], line))
+        for row in range(len(lines), len(old)):
+            writes.append(move(row, 0) + ERASE_LINE)
+        # park the cursor below the frame, clearing what was printed there
+        writes.append(move(len(lines), 0) + ERASE_BELOW)
+        out = "".join(writes)
+        self.stream.write(out)
+        self.stream.flush()
+        self.frames += 1
+        self.bytes_written += len(out)
+        self._frame = list(lines)
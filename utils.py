@@ -5,7 +5,10 @@ Project 2 - Treehouse Techdegree - Python Web Development
 """
 from constants import (BANNER, BOARD_SIZE, VERTICAL_SHIP,
                        HORIZONTAL_SHIP, EMPTY, MISS, HIT, SUNK)
+from placement import INDEX_MAX_SIZE, placement_index
+from functools import lru_cache
 import pickle
+import sys
 
 __author__ = "Chris Freeman"
 __copyright__ = "Copyright 2016, Chris Freeman"
@@ -22,10 +25,37 @@ def show_banner():
     print(BANNER)
 
 
+def legend():
+    """Return legend of board symbols"""
+    return ("Legend: Ships {} or {}   Empty {}   Miss {}   Hit {}   Sunk {}"
+            "".format(VERTICAL_SHIP, HORIZONTAL_SHIP, EMPTY, MISS, HIT, SUNK))
+
+
 def print_legend():
     """Print legend of board symbols"""
-    print("Legend: Ships {} or {}   Empty {}   Miss {}   Hit {}   Sunk {}\n"
-          "".format(VERTICAL_SHIP, HORIZONTAL_SHIP, EMPTY, MISS, HIT, SUNK))
+    print(legend() + "\n")
+
+
+def column_label(col):
+    """Return the letters of a column: A..Z, then AA..AZ, BA.. and so on
+
+    Args:
+        col (int): column offset
+    """
+    label = ""
+    col += 1
+    while col:
+        col, letter = divmod(col - 1, 26)
+        label = chr(ord('A') + letter) + label
+    return label
+
+
+def label_to_column(label):
+    """Return the column offset of column letters, see column_label"""
+    col = 0
+    for letter in label:
+        col = col * 26 + ord(letter) - ord('A') + 1
+    return col - 1
 
 
 def offset_to_coord(row, col):
@@ -38,64 +68,187 @@ def offset_to_coord(row, col):
     Returns:
         str: String coordinate in the form "A10"
     """
-    return chr(ord('A') + col) + str(row + 1)
+    return column_label(col) + str(row + 1)
 
 
 def coord_to_offset(coord):
     """Generate a row and column number from a board coordinate
 
     Args:
-        str: String coordinate in the form "A10"
+        str: String coordinate in the form "A10" or "AB12"
 
     Returns: tuple (row, column)
         row (int): 0-based row offset
         col (int): 0-based column offset
     """
-    col = ord(coord[0]) - ord('A')
-    row = int(coord[1:]) - 1
-    return (row, col)
+    letters = coord.rstrip("0123456789")
+    row = int(coord[len(letters):]) - 1
+    return (row, label_to_column(letters))
 
 
 def is_legal_coord(coord, board_size=BOARD_SIZE):
     """Verify coordinate is on the game board
 
     Args:
-        coord (str): board coordinate "<letter><number>"
+        coord (str): board coordinate "<letters><number>"
         board_size (int): size of board. Defualt
 
     Returns:
         bool: True if coordinate is legal and on the board, False otherwise.
     """
-    if len(coord) < 2:
+    coord = coord.upper()
+    letters = coord.rstrip("0123456789")
+    digits = coord[len(letters):]
+    if not letters or not digits:
         # coord  is too short to be legal
         return False
-    # covert or return False
-    try:
-        ship_col = ord(coord[0].upper())
-        ship_row = int(coord[1:])
-    except (TypeError, ValueError):
+    if not all('A' <= letter <= 'Z' for letter in letters):
         return False
     # check if coord is on board
-    return (ship_col >= ord('A') and ship_col <= ord('A') + board_size - 1 and
-            ship_row >= 1 and ship_row <= board_size)
-
-def find_symbol_in_board(board, symbol):
-    find = []
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            if board[r][c]==symbol:
-                find.append((r,c))
-    return find
-
-def compare_two_boards(new, old, symbol=SUNK):
-    if not old:
-        return []
-    diff = []
-    for r,row in enumerate(new):
-        for c, x in enumerate(row):
-            if x==SUNK and old[r][c]!=SUNK:
-                diff.append((r,c))
-    return diff
+    row, col = int(digits) - 1, label_to_column(letters)
+    return 0 <= row < board_size and 0 <= col < board_size
+
+
+@lru_cache(maxsize=None)
+def board_heading(board_size=BOARD_SIZE):
+    """Return the column heading line of a board view"""
+    width = len(column_label(board_size - 1))
+    return " " * (len(str(board_size)) + 1) + " ".join(
+        column_label(col).rjust(width) for col in range(board_size))
+
+
+@lru_cache(maxsize=None)
+def coord_tables(board_size=BOARD_SIZE):
+    """Build lookup tables between location indices and coordinates
+
+    Location (row, col) has index row * board_size + col.
+
+    Args:
+        board_size (int): size of board
+
+    Returns: tuple (names, indices)
+        names (tuple[str]): interned coordinate string of each index
+        indices (dict): coordinate string -> index
+    """
+    names = tuple(sys.intern(offset_to_coord(row, col))
+                  for row in range(board_size) for col in range(board_size))
+    return names, {name: cell for cell, name in enumerate(names)}
+
+
+# largest board whose coordinate strings are all built and kept
+TABLE_MAX_SIZE = 64
+
+
+def cell_to_coord(cell, board_size=BOARD_SIZE):
+    """Return coordinate string "A10" of a location index"""
+    if board_size > TABLE_MAX_SIZE:
+        return offset_to_coord(*divmod(cell, board_size))
+    return coord_tables(board_size)[0][cell]
+
+
+def coord_to_cell(coord, board_size=BOARD_SIZE):
+    """Return location index of a legal coordinate string "A10"
+
+    Args:
+        coord (str): board coordinate, already checked by is_legal_coord
+        board_size (int): size of board
+    """
+    cell = None
+    if board_size <= TABLE_MAX_SIZE:
+        cell = coord_tables(board_size)[1].get(coord)
+    if cell is None:
+        # not in canonical form, e.g. "a01"
+        row, col = coord_to_offset(coord.upper())
+        cell = row * board_size + col
+    return cell
+
+
+def offset_to_cell(row, col, board_size=BOARD_SIZE):
+    """Return location index of (row, col), or None if off the board"""
+    if 0 <= row < board_size and 0 <= col < board_size:
+        return row * board_size + col
+    return None
+
+
+def popcount(mask):
+    """Return the number of set bits in an integer bitmask"""
+    return bin(mask).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    # Python 3.10+
+    popcount = int.bit_count
+
+
+def random_bit(mask, rng):
+    """Return the index of a uniformly chosen set bit of a bitmask
+
+    Binary searches on popcounts of the low bits, so it takes O(log n)
+    big-integer operations rather than a walk over every set bit.
+
+    Args:
+        mask (int): non-zero bitmask
+        rng (random.Random): random source
+
+    Returns:
+        int: index of the chosen bit
+    """
+    nth = rng.randrange(popcount(mask))
+    low, high = 0, mask.bit_length()
+    # invariant: bits below low hold at most nth set bits, below high more
+    while high - low > 1:
+        mid = (low + high) // 2
+        if popcount(mask & ((1 << mid) - 1)) > nth:
+            high = mid
+        else:
+            low = mid
+    return low
+
+
+def iter_bits(mask):
+    """Yield the index of every set bit in an integer bitmask
+
+    Args:
+        mask (int): bitmask, bit i set means board index i is set
+
+    Yields:
+        int: index of each set bit, lowest first
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def ship_cells(anchor, size, direction, board_size=BOARD_SIZE):
+    """Generate ship location indices based on anchor location and size
+
+    The ship locations start at the anchor position and run Down for
+    vertical direction and run Right for horizontal direction.
+
+    Args:
+        anchor (int): location index of the anchor
+        size (int): size of ship in board spaces
+        direction (str): is ship Horizontal or Vertical
+        board_size (int): size of board
+
+    Returns:
+        tuple[int]: location indices, if all on the board. Empty tuple
+            otherwise.
+    """
+    row, col = divmod(anchor, board_size)
+    if board_size > INDEX_MAX_SIZE:
+        # no index on boards this large: compute the cells directly
+        vertical = direction[0].lower() == 'v'
+        if (not 0 <= anchor < board_size * board_size or
+                (row if vertical else col) + size > board_size):
+            return ()
+        step = board_size if vertical else 1
+        return tuple(range(anchor, anchor + size * step, step))
+    index = placement_index(board_size, size)
+    pid = index.find(row, col, direction)
+    if pid is None:
+        return ()
+    return index.cells[pid]
 
 def get_vert_or_horiz():
     """Ask user for vertical or horizontal direction"""
@@ -112,13 +265,13 @@ def get_vert_or_horiz():
             print("Error: Response {} not valid. Please Enter 'v' or 'h'!"
                   "".format(response))
 
-def get_anchor_coord():
+def get_anchor_coord(board_size=BOARD_SIZE):
     """Ask user for ship anchor coordinates"""
     while True:
         response = input("What is the upper-most or left-most ship postion "
                          "(for example D4): ").strip()
         anchor = response.upper()
-        if is_legal_coord(anchor):
+        if is_legal_coord(anchor, board_size):
             return anchor
         else:
             print("Coordnate {} is not on the board. Please enter Letter "
@@ -136,32 +289,39 @@ def ask_player_name(moniker="player"):
     return name
 
 def get_guess(player):
-    """Ask user for guess"""
+    """Ask user for guess, returns location index"""
     while True:
         response = input("Enter {}'s guess (for example D4): ".format(player.name)).strip()
         guess = response.upper()
-        if validate_guess(guess, player):
-            break
-    return guess
-        # guess = response.upper()
-        # if guess in player.guesses:
-        #     print("Coordnate {} already guessed. Try Again."
-        #           "".format(response))
-        #     continue
-        # if is_legal_coord(guess):
-        #     return guess
-        # else:
-        #     print("Coordnate {} is not on the board. Please enter Letter "
-        #           "and Number as one word.".format(response))
-
-def validate_guess(guess, player):
-    if guess in player.guesses:
-        print("Coordnate {} already guessed. Try Again."
-              "".format(guess))
+        size = player.board.size
+        if not is_legal_coord(guess, size):
+            print("Coordnate {} is not on the board. Please enter Letter "
+                  "and Number as one word.".format(response))
+            continue
+        cell = coord_to_cell(guess, size)
+        if validate_guess(cell, player):
+            return cell
+
+def validate_guess(guess, player, quiet=False):
+    """Verify guess is on the board and not already guessed
+
+    Args:
+        guess (int): location index
+        player (Player): player making the guess
+        quiet (bool): do not print the reason a guess is rejected
+
+    Returns:
+        bool: True if guess is valid, False otherwise.
+    """
+    size = player.board.size
+    if not 0 <= guess < size * size:
+        if not quiet:
+            print("Location {} is not on the board.".format(guess))
         return False
-    if not is_legal_coord(guess):
-        print("Coordnate {} is not on the board. Please enter Letter "
-              "and Number as one word.".format(guess))
+    if guess in player.guesses:
+        if not quiet:
+            print("Coordnate {} already guessed. Try Again."
+                  "".format(cell_to_coord(guess, size)))
         return False
     return True
 